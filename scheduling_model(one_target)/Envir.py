@@ -1,6 +1,209 @@
-import random
+import math
 import numpy as np
-from types import SimpleNamespace
+from types import MappingProxyType, SimpleNamespace
+
+from seeding import make_rng
+from sensor_index import SensorGridIndex
+
+
+def default_sensors():
+    """默认传感器布局（Env 与 VectorEnv 共用）"""
+    # 固定雷达（只用xy）
+    # 📝 添加传感器：直接在这个列表中添加新的字典即可
+    # 格式: {"id": N, "position": np.array([x, y]), "range": range_value}
+    return [
+        {"id": 0, "position": np.array([30.0, 50.0]), "range": 50.0},
+        {"id": 1, "position": np.array([60.0, 80.0]), "range": 50.0},
+        {"id": 2, "position": np.array([50.0, 30.0]), "range": 45.0},  # 示例：第3个传感器
+    ]
+
+
+# 奖励常数的默认值（调参记录见 IMPROVEMENTS.md）；各环境的 rewards= 参数只需给出要覆盖的项
+DEFAULT_REWARDS = MappingProxyType({
+    "detect": 10.0,             # 检测成功的基础奖励
+    "distance_bonus": 2.0,      # 距离奖励系数：目标越接近雷达中心奖励越多，最多 +distance_bonus
+    "lost_first": -2.0,         # 第一次丢失：轻微惩罚
+    "lost_second": -5.0,        # 第二次丢失：中等惩罚
+    "lost_after": -8.0,         # 之后：较大惩罚
+    "keep": 2.0,                # 保持动作的鼓励
+    "switch": -3.0,             # 切换动作的惩罚
+})
+
+
+def make_rewards(rewards=None):
+    """合并默认奖励常数与 rewards 中的覆盖项，返回 SimpleNamespace（未知的键报错）"""
+    rewards = dict(rewards or {})
+    unknown = set(rewards) - set(DEFAULT_REWARDS)
+    if unknown:
+        raise ValueError("unknown reward constants %s, expected a subset of %s"
+                         % (sorted(unknown), sorted(DEFAULT_REWARDS)))
+    return SimpleNamespace(**{k: float(rewards.get(k, v)) for k, v in DEFAULT_REWARDS.items()})
+
+
+class SensorTable:
+    """传感器布局的结构化数组（struct-of-arrays）形式，每个布局只编译一次。
+
+    positions (S, 2)、ranges (S,)、ranges_sq (S,) 为连续只读数组；
+    sensors 为保留 {"id", "position", "range"} 字典接口的只读视图，供绘图代码使用。
+    index 为覆盖圆的网格空间索引；传感器数超过 dense_limit 时覆盖查询改走索引。
+    """
+
+    dense_limit = 64
+
+    def __init__(self, sensors):
+        self.ids = np.array([int(s["id"]) for s in sensors], dtype=np.int64)
+        self.positions = np.ascontiguousarray([s["position"] for s in sensors], dtype=np.float64).reshape(-1, 2)
+        self.ranges = np.ascontiguousarray([s["range"] for s in sensors], dtype=np.float64)
+        self.ranges_sq = self.ranges * self.ranges
+        for arr in (self.ids, self.positions, self.ranges, self.ranges_sq):
+            arr.flags.writeable = False
+
+        # 只读字典视图：position 直接引用 positions 的行
+        self.sensors = tuple(
+            MappingProxyType({"id": int(i), "position": self.positions[k], "range": float(self.ranges[k])})
+            for k, i in enumerate(self.ids)
+        )
+
+        self.index = SensorGridIndex(self.positions, self.ranges)
+        self.use_index = len(self.ids) > self.dense_limit
+
+    def __len__(self):
+        return len(self.ids)
+
+    def dist_sq(self, points):
+        """points (..., 2) 到所有传感器的平方距离，返回 (..., S)"""
+        points = np.asarray(points, dtype=np.float64)
+        dx = points[..., 0, None] - self.positions[:, 0]
+        dy = points[..., 1, None] - self.positions[:, 1]
+        return dx * dx + dy * dy
+
+    def coverage(self, points):
+        """一次向量化计算所有传感器对 points (..., 2) 的覆盖情况，返回 (..., S) 布尔数组"""
+        if self.use_index:
+            points = np.asarray(points, dtype=np.float64)
+            return self.index.coverage_mask(points).reshape(points.shape[:-1] + (len(self.ids),))
+        return self.dist_sq(points) <= self.ranges_sq
+
+    def coverage_count(self, points):
+        """覆盖 points (..., 2) 中每个点的传感器个数，返回 (...,)"""
+        if self.use_index:
+            points = np.asarray(points, dtype=np.float64)
+            return (self.index.covering_batch(points) >= 0).sum(axis=1).reshape(points.shape[:-1])
+        return self.coverage(points).sum(axis=-1)
+
+    def observe(self, point, sensor):
+        """单个点到传感器 sensor 的平方距离以及是否被它覆盖（判定与 coverage 相同）"""
+        diff = point - self.positions[sensor]
+        dist_sq = diff[0] * diff[0] + diff[1] * diff[1]
+        return dist_sq, dist_sq <= self.ranges_sq[sensor]
+
+    def detectable(self, point):
+        """能观测到单个点的传感器 id 数组"""
+        if self.use_index:
+            return self.ids[self.index.covering(point)]
+        return self.ids[self.coverage(point)]
+
+    def nearest_covering(self, points):
+        """points (P, 2) 的最近覆盖传感器下标 (P,)，未被覆盖为 -1"""
+        return self.index.nearest_covering(points)
+
+    def sensors_covering_any(self, points):
+        """覆盖 points (P, 2) 中至少一个点的传感器下标（升序，绘图时只画相关传感器）"""
+        ids = self.index.covering_batch(points)
+        return np.unique(ids[ids >= 0])
+
+
+class StartSampler:
+    """起点批量采样器：一次生成一批候选点、对所有传感器向量化检测覆盖，
+    并缓存已接受的起点（及其可观测传感器掩码）供之后的 reset 消耗。
+
+    method="box"：在 [low, high]^2 区域内均匀拒绝采样，批大小按历史接受率自适应，
+        因此无论覆盖率多低，每次 reset 的摊还代价都是常数。
+    method="disc"：精确地在各覆盖圆的并集（与区域的交集）上均匀采样：按面积选圆、
+        圆内均匀取点，再以 1/覆盖次数 的概率接受以消除重叠区域的重复计数。
+    """
+
+    max_candidates = 1 << 18  # 单批候选点上限，限制内存占用
+
+    def __init__(self, sensor_table, method="disc", block_size=256, low=0.0, high=100.0, rng=None):
+        if method not in ("box", "disc"):
+            raise ValueError("method must be 'box' or 'disc', got %r" % (method,))
+        self.table = sensor_table
+        self.rng = make_rng(rng)
+        self.method = method
+        self.block_size = int(block_size)
+        self.low = float(low)
+        self.high = float(high)
+
+        self._accept_rate = 1.0
+        self._pos = np.empty((0, 2))
+        self._mask = np.empty((0, len(sensor_table)), dtype=bool)
+        self._cursor = 0
+
+        areas = sensor_table.ranges_sq
+        self._disc_cdf = np.cumsum(areas) / areas.sum()
+
+    def _candidates(self, count):
+        """生成 count 个候选点，返回候选点、接受标记，以及（disc 模式下）各点所在的圆"""
+        if self.method == "box":
+            cand = self.rng.uniform(self.low, self.high, size=(count, 2))
+            return cand, self.table.coverage_count(cand) > 0, None
+
+        k = np.minimum(np.searchsorted(self._disc_cdf, self.rng.random(count), side="right"),
+                       len(self._disc_cdf) - 1)
+        radius = self.table.ranges[k] * np.sqrt(self.rng.random(count))
+        theta = self.rng.uniform(0.0, 2 * np.pi, size=count)
+        cand = self.table.positions[k] + np.stack([radius * np.cos(theta), radius * np.sin(theta)], axis=1)
+        # 采样所用的圆一定覆盖该点；边界上的舍入误差可能使精确判断漏掉它，此时补计一次
+        d = cand - self.table.positions[k]
+        in_own = (d * d).sum(axis=1) <= self.table.ranges_sq[k]
+        count_cover = self.table.coverage_count(cand) + ~in_own
+        inside = ((cand >= self.low) & (cand <= self.high)).all(axis=1)
+        accept = inside & (self.rng.random(count) * count_cover < 1.0)
+        return cand, accept, k
+
+    def reseed(self, rng):
+        """切换随机数流并丢弃已缓存的起点与接受率估计（之后的起点只取决于新的 rng）"""
+        self.rng = make_rng(rng)
+        self._accept_rate = 1.0
+        self._pos = self._pos[:0]
+        self._mask = self._mask[:0]
+        self._cursor = 0
+
+    def _refill(self, need):
+        """至少再生成 need 个已接受的起点并追加到池中"""
+        target = max(int(need), self.block_size)
+        pos_chunks = [self._pos[self._cursor:]]
+        mask_chunks = [self._mask[self._cursor:]]
+        got = 0
+        while got < target:
+            # 按接受率估计放大候选数量，使每批大约得到 target 个起点
+            count = min(int(np.ceil((target - got) / self._accept_rate)), self.max_candidates)
+            cand, accept, k = self._candidates(count)
+            self._accept_rate = 0.5 * self._accept_rate + 0.5 * max(accept.mean(), 1e-6)
+            # 只为被接受的起点计算完整覆盖掩码
+            mask = self.table.coverage(cand[accept])
+            if k is not None:
+                mask[np.arange(len(mask)), k[accept]] = True
+            pos_chunks.append(cand[accept])
+            mask_chunks.append(mask)
+            got += int(accept.sum())
+        self._pos = np.concatenate(pos_chunks)
+        self._mask = np.concatenate(mask_chunks)
+        self._cursor = 0
+
+    def sample_many(self, n):
+        """取出 n 个起点：返回 positions (n, 2) 与可观测掩码 (n, S)"""
+        if self._cursor + n > len(self._pos):
+            self._refill(n - (len(self._pos) - self._cursor))
+        sl = slice(self._cursor, self._cursor + n)
+        self._cursor += n
+        return self._pos[sl].copy(), self._mask[sl].copy()
+
+    def sample(self):
+        """取出单个起点：返回 position (2,) 与可观测传感器 id 数组"""
+        pos, mask = self.sample_many(1)
+        return pos[0], self.table.ids[mask[0]]
 
 
 class Env:
@@ -10,84 +213,119 @@ class Env:
     action: 0 或 1（两个雷达）
     """
 
-    def __init__(self, dt=1.0, k_loss=3, max_steps=200, seed=42, loss_penalty_base=-5):
+    def __init__(self, dt=1.0, k_loss=3, max_steps=200, seed=42, sensors=None, loss_penalty_base=-5,
+                 start_method="disc", precompute=False, rewards=None):
         self.dt = float(dt)
         self.k_loss = int(k_loss)
         self.max_steps = int(max_steps)
         self.loss_penalty_base = float(loss_penalty_base)  # 基础丢失惩罚（减半以改善收敛）
+        # 奖励常数（默认见 DEFAULT_REWARDS），超参数搜索时可以覆盖
+        self.rewards = make_rewards(rewards)
+        # 预计算模式：reset 时一次算出整条轨迹与 (T, S) 覆盖时间表，step 只查表
+        self.precompute = bool(precompute)
+
+        # 每个环境拥有独立的随机数流（不修改全局随机状态）；seed 可以是 int/SeedSequence/Generator
+        self.rng = make_rng(seed)
+
+        # 传感器布局编译为结构化数组（也可直接传入 SensorTable）；self.sensors 为只读字典视图
+        if not isinstance(sensors, SensorTable):
+            sensors = SensorTable(default_sensors() if sensors is None else sensors)
+        self.sensor_table = sensors
+        self.sensors = self.sensor_table.sensors
 
-        if seed is not None:
-            np.random.seed(seed)
-            random.seed(seed)
-
-        # 两个固定雷达（只用xy）
-        # 📝 添加传感器：直接在这个列表中添加新的字典即可
-        # 格式: {"id": N, "position": np.array([x, y]), "range": range_value}
-        self.sensors = [
-            {"id": 0, "position": np.array([30.0, 50.0]), "range": 50.0},
-            {"id": 1, "position": np.array([60.0, 80.0]), "range": 50.0},
-            {"id": 2, "position": np.array([50.0, 30.0]), "range": 45.0},  # 示例：第3个传感器
-        ]
-        
         # 自动计算动作维度（等于传感器数量）
-        self.act_dim = len(self.sensors)
+        self.act_dim = len(self.sensor_table)
+
+        # 初始位置采样器（批量拒绝采样 + 起点池）
+        self.start_sampler = StartSampler(self.sensor_table, method=start_method, rng=self.rng)
 
         # 兼容训练脚本使用
         self.observation_space = SimpleNamespace(shape=(6,))
 
         # 内部状态将在 reset 中初始化
 
-    def reset(self):
-        # 随机生成初始位置，要求至少被一个雷达覆盖
-        while True:
-            x = random.uniform(0, 100)
-            y = random.uniform(0, 100)
-            pos = np.array([x, y])
-            # 找到所有能观测到该位置的雷达
-            detectable_sensors = []
-            for s in self.sensors:
-                if np.linalg.norm(pos - s["position"]) <= s["range"]:
-                    detectable_sensors.append(s["id"])
-            if detectable_sensors:
-                break
+    def reset(self, seed=None):
+        # 指定 seed 时重置本环境的随机数流，该 episode 只取决于 seed（见 seeding.episode_seed）
+        if seed is not None:
+            self.rng = make_rng(seed)
+            self.start_sampler.reseed(self.rng)
+
+        # 随机生成初始位置，要求至少被一个雷达覆盖（从采样器的起点池中取出）
+        pos, detectable_sensors = self.start_sampler.sample()
 
         self.x_true = pos.copy()
         # 目标速度：随机生成（匀速直线）
-        self.v_true = np.array([random.uniform(-5.0, 5.0), random.uniform(-5.0, 5.0)])
+        self.v_true = self.rng.uniform(-5.0, 5.0, size=2)
 
         # 初始动作：随机选择一个能观测到目标的传感器
-        self.last_action = random.choice(detectable_sensors)
+        self.last_action = int(detectable_sensors[self.rng.integers(len(detectable_sensors))])
         # 上一次被观测到的位置（初始为当前真值）
         self.last_obs = self.x_true.copy()
         # 连续丢失计数
         self.lost_steps = 0
         self.t = 0
 
+        if self.precompute:
+            self._precompute_episode()
+
         prev_pos = self.x_true - self.v_true * self.dt
         obs = np.array([self.x_true[0], self.x_true[1], prev_pos[0], prev_pos[1], float(self.last_action), 0.0], dtype=np.float32)
         return obs
 
+    def _precompute_episode(self):
+        """目标做匀速直线运动且不受动作影响：一次算出 t=1..max_steps 的轨迹、
+        到所有传感器的距离、检测结果以及检测奖励（与逐步计算逐位一致）"""
+        table = self.sensor_table
+        steps = np.empty((self.max_steps + 1, 2))
+        steps[0] = self.x_true
+        steps[1:] = self.v_true * self.dt
+        # add.accumulate 按顺序逐项累加，与逐步 x_true + v_true * dt 的舍入完全相同
+        self.trajectory = np.add.accumulate(steps, axis=0)[1:]
+        self.dist_table = np.sqrt(table.dist_sq(self.trajectory))
+        # 覆盖判定经由 SensorTable：传感器较多时走网格索引
+        self.detect_table = table.coverage(self.trajectory)
+        r = self.rewards
+        self.detect_reward_table = r.detect + np.maximum(0, (table.ranges - self.dist_table) / table.ranges
+                                                         * r.distance_bonus)
+        for arr in (self.trajectory, self.dist_table, self.detect_table, self.detect_reward_table):
+            arr.flags.writeable = False
+
+    def _observe(self, a):
+        """逐步计算所选雷达 a 的距离、检测结果与检测奖励"""
+        table = self.sensor_table
+        sensor_range = table.ranges[a]
+        dist_sq, detect = table.observe(self.x_true, a)
+        dist = np.sqrt(dist_sq)  # 与 VectorEnv 逐位一致的二维距离
+        # 检测成功：基础奖励 + 距离相关的微调奖励（距离越近奖励越多）
+        r = self.rewards
+        detect_reward = r.detect + max(0, (sensor_range - dist) / sensor_range * r.distance_bonus)
+        return dist, detect, detect_reward
+
     def step(self, action: int):
         # 更新时间步
         self.t += 1
-        # 更新真实位置
-        self.x_true = self.x_true + self.v_true * self.dt
+        a = int(action)
 
-        # 观测判断（以所选雷达为准）
-        sensor = self.sensors[int(action)]
-        dist = np.linalg.norm(self.x_true - sensor["position"])
-        detect = dist <= sensor["range"]
+        if self.precompute and self.t <= self.max_steps:
+            # 预计算模式：O(1) 查表
+            row = self.t - 1
+            self.x_true = self.trajectory[row]
+            dist = self.dist_table[row, a]
+            detect = self.detect_table[row, a]
+            detect_reward = self.detect_reward_table[row, a]
+        else:
+            # 更新真实位置
+            self.x_true = self.x_true + self.v_true * self.dt
+            # 观测判断（以所选雷达为准）
+            dist, detect, detect_reward = self._observe(a)
 
         # 改进的奖励设计：使用平滑的奖励函数
         reward = 0.0
         lost_flag = 0.0
         
         if detect:
-            # 检测成功：基础奖励 + 距离奖励（距离越近奖励越多）
-            reward = 10.0
-            # 加入距离相关的微调奖励
-            distance_bonus = max(0, (sensor["range"] - dist) / sensor["range"] * 2)
-            reward += distance_bonus
+            # 检测成功：基础奖励 + 距离奖励
+            reward = detect_reward
             # 更新上次观测到的位置
             self.last_obs = self.x_true.copy()
             self.lost_steps = 0
@@ -95,19 +333,19 @@ class Env:
         else:
             # 丢失惩罚：采用阶跃而非线性递增，避免过度惩罚
             if self.lost_steps == 0:
-                reward = -2.0  # 第一次丢失：轻微惩罚
+                reward = self.rewards.lost_first  # 第一次丢失：轻微惩罚
             elif self.lost_steps == 1:
-                reward = -5.0  # 第二次丢失：中等惩罚
+                reward = self.rewards.lost_second  # 第二次丢失：中等惩罚
             else:
-                reward = -8.0  # 之后：较大惩罚
+                reward = self.rewards.lost_after  # 之后：较大惩罚
             self.lost_steps += 1
             lost_flag = 1.0
 
         # 切换惩罚/奖励（降低权重）
         if self.last_action == action:
-            reward += 2.0  # 保持动作有较小的鼓励
+            reward += self.rewards.keep  # 保持动作有较小的鼓励
         else:
-            reward += -3.0  # 切换动作有较小的惩罚
+            reward += self.rewards.switch  # 切换动作有较小的惩罚
 
         # 终止条件：连续丢失超过 k_loss 或达到最大时间步
         done = False
@@ -132,6 +370,333 @@ class Env:
         return obs, float(reward), bool(done), info
 
 
+class FastEnv:
+    """低开销标量环境：与 Env 相同的奖励/终止语义和随机数消耗（同一 seed 下逐位一致），
+    但状态保存在 __slots__ 中、二维几何用 Python 标量浮点计算，避免每步的小数组分配。
+
+    - reset/step 默认把 obs 写入预分配缓冲区并返回它（下一步会被覆盖，需要保留时请 copy），
+      也可以通过 out= 写入调用方提供的 (6,) 数组（例如批量数组的一行）；
+    - step(..., info=False) 跳过 info 字典的构造，返回的 info 为 None。
+    """
+
+    __slots__ = (
+        "dt", "k_loss", "max_steps", "sensor_table", "sensors", "act_dim", "observation_space",
+        "rng", "start_sampler", "rewards", "_sx", "_sy", "_r", "_r2",
+        "x", "y", "vx", "vy", "last_x", "last_y", "last_action", "lost_steps", "t", "_obs",
+    )
+
+    def __init__(self, dt=1.0, k_loss=3, max_steps=200, seed=42, sensors=None, start_method="disc", rewards=None):
+        self.dt = float(dt)
+        self.k_loss = int(k_loss)
+        self.max_steps = int(max_steps)
+        self.rewards = make_rewards(rewards)
+
+        self.rng = make_rng(seed)
+
+        if not isinstance(sensors, SensorTable):
+            sensors = SensorTable(default_sensors() if sensors is None else sensors)
+        self.sensor_table = sensors
+        self.sensors = sensors.sensors
+        self.act_dim = len(sensors)
+        self.start_sampler = StartSampler(sensors, method=start_method, rng=self.rng)
+        self.observation_space = SimpleNamespace(shape=(6,))
+
+        # 传感器几何转为 Python 浮点列表，step 中直接按下标取用
+        self._sx = sensors.positions[:, 0].tolist()
+        self._sy = sensors.positions[:, 1].tolist()
+        self._r = sensors.ranges.tolist()
+        self._r2 = sensors.ranges_sq.tolist()
+
+        self._obs = np.zeros(6, dtype=np.float32)
+
+    @property
+    def x_true(self):
+        return np.array([self.x, self.y])
+
+    def reset(self, out=None, seed=None):
+        if seed is not None:
+            self.rng = make_rng(seed)
+            self.start_sampler.reseed(self.rng)
+        pos, detectable_sensors = self.start_sampler.sample()
+        self.x = float(pos[0])
+        self.y = float(pos[1])
+        self.vx, self.vy = self.rng.uniform(-5.0, 5.0, size=2).tolist()
+        self.last_action = int(detectable_sensors[self.rng.integers(len(detectable_sensors))])
+        self.last_x = self.x
+        self.last_y = self.y
+        self.lost_steps = 0
+        self.t = 0
+
+        obs = self._obs if out is None else out
+        obs[:] = (self.x, self.y, self.x - self.vx * self.dt, self.y - self.vy * self.dt, self.last_action, 0.0)
+        return obs
+
+    def step(self, action, out=None, info=True):
+        a = int(action)
+        self.t += 1
+        x = self.x = self.x + self.vx * self.dt
+        y = self.y = self.y + self.vy * self.dt
+
+        dx = x - self._sx[a]
+        dy = y - self._sy[a]
+        dist_sq = dx * dx + dy * dy
+        dist = math.sqrt(dist_sq)
+        r = self.rewards
+
+        if dist_sq <= self._r2[a]:
+            detect = True
+            sensor_range = self._r[a]
+            reward = r.detect + max(0, (sensor_range - dist) / sensor_range * r.distance_bonus)
+            self.last_x = x
+            self.last_y = y
+            self.lost_steps = 0
+            lost_flag = 0.0
+        else:
+            detect = False
+            lost = self.lost_steps
+            reward = r.lost_first if lost == 0 else (r.lost_second if lost == 1 else r.lost_after)
+            self.lost_steps = lost + 1
+            lost_flag = 1.0
+
+        reward += r.keep if self.last_action == a else r.switch
+        done = self.lost_steps >= self.k_loss or self.t >= self.max_steps
+
+        obs = self._obs if out is None else out
+        obs[:] = (x, y, self.last_x, self.last_y, self.last_action, lost_flag)
+        self.last_action = a
+
+        if info:
+            return obs, reward, done, {"detect": detect, "dist": dist, "lost_steps": self.lost_steps}
+        return obs, reward, done, None
+
+
+def _choose_detectable(mask, rng):
+    """在每行可观测的传感器（mask (N, S) 为 True 的列）中均匀随机选择一个"""
+    k = (rng.random(len(mask)) * mask.sum(axis=1)).astype(np.int64)
+    return (np.cumsum(mask, axis=1) > k[:, None]).argmax(axis=1)
+
+
+def _batched_rewards(dist, detect, ranges, lost_steps, keep, rewards):
+    """与 Env.step 相同的奖励（批量版本）：检测成功为基础奖励 + 距离奖励，
+    丢失按连续丢失次数阶跃惩罚，再加保持/切换传感器的奖惩；rewards 为 make_rewards 的结果"""
+    r = rewards
+    distance_bonus = np.maximum(0, (ranges - dist) / ranges * r.distance_bonus)
+    lost_penalty = np.where(lost_steps == 0, r.lost_first, np.where(lost_steps == 1, r.lost_second, r.lost_after))
+    reward = np.where(detect, r.detect + distance_bonus, lost_penalty)
+    return reward + np.where(keep, r.keep, r.switch)
+
+
+class VectorEnv:
+    """批量环境：N 个目标在一次 NumPy 调用中同时推进。
+
+    状态（位置、速度、last_obs、lost_steps、last_action、t）均为 (N, ...) 数组，
+    奖励与终止语义与标量 Env.step 完全一致。结束的槽位会自动 reset，
+    其终止时刻的 obs 放在 info["final_obs"] 中（训练时作为 next_obs 使用）。
+    """
+
+    def __init__(self, num_envs, dt=1.0, k_loss=3, max_steps=200, seed=42, sensors=None, start_method="disc",
+                 rewards=None):
+        self.num_envs = int(num_envs)
+        self.dt = float(dt)
+        self.k_loss = int(k_loss)
+        self.max_steps = int(max_steps)
+        self.rewards = make_rewards(rewards)
+
+        self.rng = make_rng(seed)
+
+        if not isinstance(sensors, SensorTable):
+            sensors = SensorTable(default_sensors() if sensors is None else sensors)
+        self.sensor_table = sensors
+        self.sensors = sensors.sensors
+        self.act_dim = len(sensors)
+        self.start_sampler = StartSampler(sensors, method=start_method, block_size=max(256, self.num_envs),
+                                          rng=self.rng)
+        self.observation_space = SimpleNamespace(shape=(6,))
+
+        n = self.num_envs
+        self.x_true = np.zeros((n, 2))
+        self.v_true = np.zeros((n, 2))
+        self.last_obs = np.zeros((n, 2))
+        self.lost_steps = np.zeros(n, dtype=np.int64)
+        self.last_action = np.zeros(n, dtype=np.int64)
+        self.t = np.zeros(n, dtype=np.int64)
+
+    def _reset_slots(self, idx):
+        """重置指定槽位，返回这些槽位的初始 obs"""
+        count = idx.size
+        pos, mask = self.start_sampler.sample_many(count)
+        v = self.rng.uniform(-5.0, 5.0, size=(count, 2))
+
+        # 在每行可观测的传感器中均匀随机选择一个作为初始动作
+        action = _choose_detectable(mask, self.rng)
+
+        self.x_true[idx] = pos
+        self.v_true[idx] = v
+        self.last_obs[idx] = pos
+        self.last_action[idx] = action
+        self.lost_steps[idx] = 0
+        self.t[idx] = 0
+
+        prev_pos = pos - v * self.dt
+        obs = np.zeros((count, 6), dtype=np.float32)
+        obs[:, 0:2] = pos
+        obs[:, 2:4] = prev_pos
+        obs[:, 4] = action
+        return obs
+
+    def reset(self):
+        return self._reset_slots(np.arange(self.num_envs))
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+
+        self.t += 1
+        self.x_true = self.x_true + self.v_true * self.dt
+
+        # 所选雷达的距离与检测结果（平方距离比较，与标量 Env.step 逐位一致）
+        table = self.sensor_table
+        diff = self.x_true - table.positions[actions]
+        dist_sq = diff[:, 0] * diff[:, 0] + diff[:, 1] * diff[:, 1]
+        dist = np.sqrt(dist_sq)
+        ranges = table.ranges[actions]
+        detect = dist_sq <= table.ranges_sq[actions]
+
+        reward = _batched_rewards(dist, detect, ranges, self.lost_steps, self.last_action == actions, self.rewards)
+
+        self.last_obs[detect] = self.x_true[detect]
+        self.lost_steps = np.where(detect, 0, self.lost_steps + 1)
+        lost_flag = (~detect).astype(np.float32)
+
+        done = (self.lost_steps >= self.k_loss) | (self.t >= self.max_steps)
+
+        obs = np.empty((self.num_envs, 6), dtype=np.float32)
+        obs[:, 0:2] = self.x_true
+        obs[:, 2:4] = self.last_obs
+        obs[:, 4] = self.last_action
+        obs[:, 5] = lost_flag
+
+        info = {"detect": detect, "dist": dist, "lost_steps": self.lost_steps.copy()}
+
+        self.last_action = actions.copy()
+
+        # 自动重置已结束的槽位（final_obs 保留终止时刻的 obs）
+        info["final_obs"] = obs
+        done_idx = np.flatnonzero(done)
+        if done_idx.size:
+            info["final_obs"] = obs.copy()
+            obs[done_idx] = self._reset_slots(done_idx)
+
+        return obs, reward, done, info
+
+    def close(self):
+        """与 SubprocVectorEnv 保持接口一致（进程内环境无需释放资源）"""
+        pass
+
+
+class MultiTargetEnv:
+    """多目标调度环境：M 个目标共享同一组传感器，目标状态均为 (M, ...) 数组。
+
+    obs 为 (M, 6)，每行与单目标 Env 的 obs 含义相同。动作有两种形式：
+    - action_mode="target"：长度 M 的向量，每个目标选择一个传感器；
+    - action_mode="sensor"：长度 S 的向量，每个传感器分配给一个目标下标（-1 表示空闲），
+      目标被任一分配给它的传感器覆盖即视为检测成功，其 last_sensor_id 取其中最近的那个。
+    每步一次计算 (M, S) 距离矩阵，返回每个目标各自的奖励 (M,)。单个目标连续丢失
+    k_loss 步后即结束（之后奖励为 0）；所有目标结束或达到 max_steps 时整个 episode 结束，
+    见 info["episode_done"]。
+    """
+
+    def __init__(self, num_targets=3, dt=1.0, k_loss=3, max_steps=200, seed=42, sensors=None,
+                 start_method="disc", action_mode="target", rewards=None):
+        if action_mode not in ("target", "sensor"):
+            raise ValueError("action_mode must be 'target' or 'sensor', got %r" % (action_mode,))
+        self.num_targets = int(num_targets)
+        self.dt = float(dt)
+        self.k_loss = int(k_loss)
+        self.max_steps = int(max_steps)
+        self.rewards = make_rewards(rewards)
+        self.action_mode = action_mode
+
+        self.rng = make_rng(seed)
+
+        if not isinstance(sensors, SensorTable):
+            sensors = SensorTable(default_sensors() if sensors is None else sensors)
+        self.sensor_table = sensors
+        self.sensors = sensors.sensors
+        self.act_dim = len(sensors)
+        self.start_sampler = StartSampler(sensors, method=start_method, rng=self.rng)
+        self.observation_space = SimpleNamespace(shape=(self.num_targets, 6))
+
+    def reset(self):
+        m = self.num_targets
+        pos, mask = self.start_sampler.sample_many(m)
+        self.x_true = pos
+        self.v_true = self.rng.uniform(-5.0, 5.0, size=(m, 2))
+        self.last_action = _choose_detectable(mask, self.rng)
+        self.last_obs = pos.copy()
+        self.lost_steps = np.zeros(m, dtype=np.int64)
+        self.active = np.ones(m, dtype=bool)
+        self.t = 0
+
+        obs = np.zeros((m, 6), dtype=np.float32)
+        obs[:, 0:2] = pos
+        obs[:, 2:4] = pos - self.v_true * self.dt
+        obs[:, 4] = self.last_action
+        return obs
+
+    def _targets_from_assignment(self, assignment, dist_sq, cover):
+        """把按传感器的分配 (S,) 转换为每个目标的 (所选传感器, 是否检测成功)"""
+        assignment = np.asarray(assignment, dtype=np.int64).reshape(self.act_dim)
+        assigned = assignment[None, :] == np.arange(self.num_targets)[:, None]   # (M, S)
+        # 优先选覆盖目标的最近传感器，其次选最近的已分配传感器；没有分配则沿用上一次的传感器
+        key = np.where(cover, dist_sq, dist_sq + (dist_sq.max() + 1.0))
+        best = np.where(assigned, key, np.inf).argmin(axis=1)
+        chosen = np.where(assigned.any(axis=1), best, self.last_action)
+        detect = (assigned & cover).any(axis=1)
+        return chosen, detect
+
+    def step(self, action):
+        m = self.num_targets
+        rows = np.arange(m)
+        self.t += 1
+        self.x_true = self.x_true + self.v_true * self.dt
+
+        # 一次计算所有 目标-传感器 对的平方距离与覆盖情况 (M, S)
+        dist_sq_all = self.sensor_table.dist_sq(self.x_true)
+        cover = dist_sq_all <= self.sensor_table.ranges_sq
+
+        if self.action_mode == "target":
+            chosen = np.asarray(action, dtype=np.int64).reshape(m)
+            detect = cover[rows, chosen]
+        else:
+            chosen, detect = self._targets_from_assignment(action, dist_sq_all, cover)
+
+        dist = np.sqrt(dist_sq_all[rows, chosen])
+        ranges = self.sensor_table.ranges[chosen]
+        reward = _batched_rewards(dist, detect, ranges, self.lost_steps, self.last_action == chosen, self.rewards)
+
+        # 已结束的目标不再更新状态、不再获得奖励
+        active = self.active
+        reward = np.where(active, reward, 0.0)
+        detected = active & detect
+        self.last_obs[detected] = self.x_true[detected]
+        self.lost_steps = np.where(active, np.where(detect, 0, self.lost_steps + 1), self.lost_steps)
 
+        obs = np.empty((m, 6), dtype=np.float32)
+        obs[:, 0:2] = self.x_true
+        obs[:, 2:4] = self.last_obs
+        obs[:, 4] = self.last_action
+        obs[:, 5] = ~detect
 
+        self.last_action = np.where(active, chosen, self.last_action)
+        self.active = active & (self.lost_steps < self.k_loss)
+        done = ~self.active | (self.t >= self.max_steps)
+        episode_done = bool(done.all())
 
+        info = {
+            "detect": detected,
+            "dist": dist,
+            "lost_steps": self.lost_steps.copy(),
+            "coverage": cover,
+            "episode_done": episode_done,
+        }
+        return obs, reward, done, info
@@ -0,0 +1,252 @@
+"""
+Actor-Learner 训练模式：
+- 多个 actor 进程各自运行 Envir.Env，用 NumPy 版策略（numpy_policy.Policy，不导入 paddle）做 ε-greedy 采样，
+  把经验按块（chunk）写入队列；
+- learner（主进程）持续从回放缓冲区采样训练，每 sync_interval 次更新把最新权重发布到共享内存，
+  actor 发现版本号变化后复制一份新权重（seqlock：写入期间版本号为奇数，读前后版本号一致才算读到完整权重）；
+- 定期报告 env-steps/sec 与 updates/sec。
+
+使用示例：
+  python actor_learner.py --num_actors 4 --sync_interval 50 --max_updates 20000
+"""
+
+import os
+import time
+import queue
+import argparse
+import importlib.util
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+from Envir import Env
+from numpy_policy import LAYERS, Policy, arrays_from_state
+from seeding import make_rng, spawn_seeds
+
+os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _param_layout(arrays):
+    """扁平权重向量中各参数的 (名称, 形状, 起点, 终点)"""
+    layout, start = [], 0
+    for name in LAYERS:
+        for key in (name + ".weight", name + ".bias"):
+            size = arrays[key].size
+            layout.append((key, arrays[key].shape, start, start + size))
+            start += size
+    return layout, start
+
+
+class SharedWeights:
+    """共享内存中的扁平 float32 权重 + int64 版本号（seqlock）"""
+
+    def __init__(self, layout, size, name=None):
+        self.layout = layout
+        create = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=8 + 4 * size)
+        self.version = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf, offset=0)
+        self.flat = np.ndarray((size,), dtype=np.float32, buffer=self.shm.buf, offset=8)
+        if create:
+            self.version[0] = 0
+
+    def publish(self, arrays):
+        self.version[0] += 1            # 奇数：正在写入
+        for key, _, lo, hi in self.layout:
+            self.flat[lo:hi] = arrays[key].ravel()
+        self.version[0] += 1            # 偶数：写入完成
+
+    def read(self):
+        """读取一份完整的权重：返回 (版本号, {名称: 数组})"""
+        while True:
+            v0 = int(self.version[0])
+            if v0 % 2:
+                time.sleep(0)
+                continue
+            flat = self.flat.copy()
+            if int(self.version[0]) == v0:
+                return v0, {key: flat[lo:hi].reshape(shape) for key, shape, lo, hi in self.layout}
+
+    def close(self):
+        del self.version, self.flat
+        self.shm.close()
+
+
+def _actor(rank, seed, shm_name, layout, size, out_queue, stop, chunk_size, e_greed, e_greed_decrement):
+    """actor 进程：与 CartpoleAgent.sample 相同的 ε-greedy 规则与 ε 衰减，经验按块放入队列"""
+    weights = SharedWeights(layout, size, name=shm_name)
+    env_seed, agent_seed = spawn_seeds(seed, 2)
+    env = Env(seed=env_seed)
+    rng = make_rng(agent_seed)
+    version, arrays = weights.read()
+    policy = Policy.from_arrays(arrays)
+
+    obs_dim = env.observation_space.shape[0]
+    buf_obs = np.empty((chunk_size, obs_dim), dtype=np.float32)
+    buf_next = np.empty((chunk_size, obs_dim), dtype=np.float32)
+    buf_act = np.empty(chunk_size, dtype=np.int64)
+    buf_reward = np.empty(chunk_size, dtype=np.float32)
+    buf_done = np.empty(chunk_size, dtype=bool)
+    n = 0
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                out_queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    try:
+        while not stop.is_set():
+            obs = env.reset()
+            total_reward, total_detect, total_steps, lost, switches = 0.0, 0, 0, 0, 0
+            last_action = None
+            done = False
+            while not done and not stop.is_set():
+                if int(weights.version[0]) != version:      # 学习者发布了新权重
+                    version, arrays = weights.read()
+                    policy.set_weights(arrays)
+
+                if rng.random() < e_greed or rng.random() < 0.01:
+                    action = int(rng.integers(env.act_dim))
+                else:
+                    action = policy.act(obs)
+                e_greed = max(0.01, e_greed - e_greed_decrement)
+
+                next_obs, reward, done, info = env.step(action)
+                buf_obs[n], buf_act[n], buf_reward[n], buf_next[n], buf_done[n] = obs, action, reward, next_obs, done
+                n += 1
+                if n == chunk_size:
+                    put(("chunk", (buf_obs.copy(), buf_act.copy(), buf_reward.copy(), buf_next.copy(),
+                                   buf_done.copy())))
+                    n = 0
+
+                total_steps += 1
+                total_reward += reward
+                total_detect += int(info['detect'])
+                lost |= int(info['lost_steps'] >= env.k_loss)
+                switches += int(last_action is not None and action != last_action)
+                last_action = action
+                obs = next_obs
+            if done:
+                put(("episode", (rank, total_reward, total_detect / total_steps, lost, switches / total_steps)))
+    finally:
+        weights.close()
+
+
+def load_train_module():
+    """train(2).py 的文件名不是合法模块名，按路径导入（复用其超参数与 learn_step）"""
+    spec = importlib.util.spec_from_file_location("train_script", os.path.join(PROJECT_DIR, "train(2).py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run(args):
+    import paddle
+    from parl.utils import logger, ReplayMemory
+    from parl.algorithms import DQN
+    from cartpole_model import CartpoleModel
+    from cartpole_agent import CartpoleAgent
+    from prioritized_replay import bulk_append
+
+    train = load_train_module()
+    actor_seeds = spawn_seeds(args.seed, args.num_actors + 1)
+    paddle.seed(args.seed)
+
+    act_dim = Env(seed=0).act_dim
+    obs_dim = 6
+    model = CartpoleModel(obs_dim=obs_dim, act_dim=act_dim)
+    alg = DQN(model, gamma=train.GAMMA, lr=train.LEARNING_RATE)
+    agent = CartpoleAgent(alg, act_dim=act_dim, e_greed=0.0, e_greed_decrement=0.0, rng=actor_seeds[-1])
+    rpm = ReplayMemory(train.MEMORY_SIZE, obs_dim, 0)
+
+    arrays = arrays_from_state(model.state_dict())
+    layout, size = _param_layout(arrays)
+    weights = SharedWeights(layout, size)
+    weights.publish(arrays)
+
+    ctx = mp.get_context(args.context)
+    out_queue = ctx.Queue(maxsize=args.queue_size)
+    stop = ctx.Event()
+    actors = [ctx.Process(target=_actor, daemon=True,
+                          args=(rank, actor_seeds[rank], weights.shm.name, layout, size, out_queue, stop,
+                                args.chunk_size, 1.0, 1e-4))
+              for rank in range(args.num_actors)]
+    for p in actors:
+        p.start()
+
+    env_steps = updates = episodes = 0
+    recent = []
+    start = last_report = time.time()
+    steps_at_report = updates_at_report = 0
+
+    def drain(block):
+        nonlocal env_steps, episodes
+        got = False
+        while True:
+            try:
+                kind, payload = out_queue.get(timeout=0.5) if block and not got else out_queue.get_nowait()
+            except queue.Empty:
+                return
+            got = True
+            if kind == "chunk":
+                bulk_append(rpm, *payload)
+                env_steps += len(payload[0])
+            else:
+                episodes += 1
+                recent.append(payload[1:])
+                del recent[:-100]
+
+    try:
+        while updates < args.max_updates:
+            warm = len(rpm) > train.MEMORY_WARMUP_SIZE
+            drain(block=not warm)
+            if warm:
+                train.learn_step(agent, rpm)
+                updates += 1
+                if updates % args.sync_interval == 0:
+                    weights.publish(arrays_from_state(model.state_dict()))
+
+            now = time.time()
+            if now - last_report >= args.report_interval:
+                dt = now - last_report
+                stats = np.mean(recent, axis=0) if recent else np.zeros(4)
+                logger.info('env-steps/sec {:.0f}, updates/sec {:.1f}, episodes {}, replay {}, weights v{}, '
+                            'reward {:.2f}, detect {:.3f}, lost {:.3f}, switch {:.3f}'.format(
+                                (env_steps - steps_at_report) / dt, (updates - updates_at_report) / dt, episodes,
+                                len(rpm), int(weights.version[0]) // 2, *stats))
+                last_report, steps_at_report, updates_at_report = now, env_steps, updates
+    finally:
+        stop.set()
+        while any(p.is_alive() for p in actors):     # 清空队列，使 actor 的队列后台线程能够退出
+            drain(block=False)
+            for p in actors:
+                p.join(timeout=0.05)
+        weights.close()
+        weights.shm.unlink()
+
+    elapsed = time.time() - start
+    logger.info('done: {} env steps ({:.0f}/s), {} updates ({:.1f}/s), {} episodes in {:.1f}s'.format(
+        env_steps, env_steps / elapsed, updates, updates / elapsed, episodes, elapsed))
+
+    agent.save('./model.ckpt')
+    np.savez('./policy.npz', **arrays_from_state(model.state_dict()))
+    return agent
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Actor-learner DQN training')
+    parser.add_argument('--num_actors', type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help='actor processes stepping Envir.Env')
+    parser.add_argument('--sync_interval', type=int, default=50,
+                        help='learner updates between weight publications to the actors')
+    parser.add_argument('--max_updates', type=int, default=20000, help='stop after this many learner updates')
+    parser.add_argument('--chunk_size', type=int, default=256, help='transitions per queue message')
+    parser.add_argument('--queue_size', type=int, default=64, help='max chunks waiting in the queue')
+    parser.add_argument('--report_interval', type=float, default=10.0, help='seconds between throughput reports')
+    parser.add_argument('--seed', type=int, default=42, help='root random seed')
+    parser.add_argument('--context', type=str, default='spawn', help='multiprocessing start method')
+    run(parser.parse_args())
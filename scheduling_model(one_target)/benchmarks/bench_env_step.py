@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+微基准：比较各环境实现的 step 吞吐量（steps/sec）
+- Env.step (current)            当前的标量 Env（已包含 SensorTable 等改动，不是最初的实现）
+- Env.step (reference)          --reference 给出的另一份 Envir.py 中的 Env（例如基线提交的版本）
+- Env(precompute=True).step     预计算覆盖时间表
+- FastEnv.step                  __slots__ + 标量浮点（带 info）
+- FastEnv.step(out=, info=False) 无分配快速路径
+- VectorEnv.step                批量环境（按单个环境步计）
+
+倍数以 reference 为基准（给出 --reference 时），否则以 Env.step (current) 为基准，输出中注明。
+
+使用示例：
+  python bench_env_step.py
+  python bench_env_step.py --steps 500000 --num-envs 4096
+  git show <baseline>:"scheduling_model(one_target)/Envir.py" > /tmp/Envir_baseline.py
+  python bench_env_step.py --reference /tmp/Envir_baseline.py
+"""
+
+import os
+import sys
+import time
+import argparse
+import importlib.util
+import numpy as np
+
+# 添加父目录到路径以导入模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Envir import Env, FastEnv, VectorEnv
+
+
+def bench_scalar(env, actions, **step_kwargs):
+    """逐步推进标量环境，返回 steps/sec"""
+    env.reset()
+    step = env.step
+    reset = env.reset
+    start = time.perf_counter()
+    for a in actions:
+        done = step(a, **step_kwargs)[2]
+        if done:
+            reset()
+    return len(actions) / (time.perf_counter() - start)
+
+
+def load_reference_env(path):
+    """按路径导入另一份 Envir.py，返回其中的 Env 类"""
+    spec = importlib.util.spec_from_file_location("envir_reference", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.Env
+
+
+def bench_vector(num_envs, total_steps, seed):
+    """批量环境：返回单环境步意义下的 steps/sec"""
+    venv = VectorEnv(num_envs, seed=seed)
+    venv.reset()
+    iters = max(1, total_steps // num_envs)
+    actions = np.random.randint(venv.act_dim, size=(iters, num_envs))
+    start = time.perf_counter()
+    for a in actions:
+        venv.step(a)
+    return iters * num_envs / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Env.step micro-benchmark')
+    parser.add_argument('--steps', type=int, default=200000, help='Steps per scalar benchmark')
+    parser.add_argument('--num-envs', type=int, default=1024, help='Batch size for VectorEnv')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--reference', type=str, default=None,
+                        help='Envir.py of another version (e.g. the baseline commit) to benchmark its Env.step against')
+    args = parser.parse_args()
+
+    np.random.seed(args.seed)
+    act_dim = Env(seed=args.seed).act_dim
+    actions = np.random.randint(act_dim, size=args.steps).tolist()
+    out = np.zeros(6, dtype=np.float32)
+
+    results = []
+    if args.reference:
+        results.append(("Env.step (reference)", bench_scalar(load_reference_env(args.reference)(seed=args.seed),
+                                                             actions)))
+    results += [
+        ("Env.step (current)", bench_scalar(Env(seed=args.seed), actions)),
+        ("Env(precompute=True).step", bench_scalar(Env(seed=args.seed, precompute=True), actions)),
+        ("FastEnv.step", bench_scalar(FastEnv(seed=args.seed), actions)),
+        ("FastEnv.step(out=, info=False)", bench_scalar(FastEnv(seed=args.seed), actions, out=out, info=False)),
+        (f"VectorEnv.step (N={args.num_envs})", bench_vector(args.num_envs, args.steps * 10, args.seed)),
+    ]
+
+    baseline = results[0][1]
+    print("\n" + "="*60)
+    print("ENV STEP MICRO-BENCHMARK")
+    if args.reference:
+        print(f"speedups relative to Env.step from {args.reference}")
+    else:
+        print("speedups relative to the current Env.step (pass --reference for the original implementation)")
+    print("="*60)
+    for name, rate in results:
+        print(f"{name:<36s} {rate:>14,.0f} steps/s  x{rate / baseline:6.2f}")
+    print("="*60 + "\n")
+
+
+if __name__ == '__main__':
+    main()
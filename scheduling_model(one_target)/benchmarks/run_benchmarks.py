@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+性能基准套件：测量训练/推理热路径的吞吐量与延迟，并与保存的基线比较
+- env_step / env_reset                Env.step、Env.reset
+- agent_predict / agent_sample        CartpoleAgent.predict、CartpoleAgent.sample
+- agent_learn                         CartpoleAgent.learn（BATCH_SIZE=128）
+- replay_sample_batch                 ReplayMemory.sample_batch（BATCH_SIZE=128）
+- train_episode                       train(2).py 中完整的 run_train_episode
+
+每个用例固定随机种子、先预热再计时，报告 ops/sec 与 p50/p99 延迟，结果保存为 JSON。
+只使用 CPU，无需联网；未安装 paddle/parl 时相关用例会被跳过。
+
+使用示例：
+  python run_benchmarks.py --save-baseline               # 生成基线 benchmarks/baseline.json
+  python run_benchmarks.py                               # 与基线比较，回退超过阈值或缺少基线时返回码为 1
+  python run_benchmarks.py --cases env_step agent_learn --threshold 0.1
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import importlib.util
+import numpy as np
+
+os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
+os.environ["CUDA_VISIBLE_DEVICES"] = ""     # 只使用 CPU
+
+# 添加父目录到路径以导入模块
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from Envir import Env
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_OUT = os.path.join(BENCH_DIR, 'results.json')
+
+OBS_DIM = 6
+BATCH_SIZE = 128
+
+
+def seed_all(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    try:
+        import paddle
+        paddle.seed(seed)
+    except ImportError:
+        pass
+
+
+def measure(fn, iters, warmup, ops_per_call=1):
+    """预热 warmup 次后计时 iters 次调用，返回吞吐量与延迟分位数"""
+    for _ in range(warmup):
+        fn()
+    lat = np.empty(iters, dtype=np.int64)
+    clock = time.perf_counter_ns
+    for i in range(iters):
+        t0 = clock()
+        fn()
+        lat[i] = clock() - t0
+    total_s = lat.sum() / 1e9
+    return {
+        "ops_per_sec": ops_per_call * iters / total_s if total_s > 0 else float('inf'),
+        "p50_us": float(np.percentile(lat, 50)) / 1e3,
+        "p99_us": float(np.percentile(lat, 99)) / 1e3,
+        "iters": iters,
+    }
+
+
+def load_train_module():
+    """train(2).py 的文件名不是合法模块名，按路径导入"""
+    spec = importlib.util.spec_from_file_location("train_script", os.path.join(PROJECT_DIR, "train(2).py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_agent(act_dim):
+    import paddle
+    from parl.algorithms import DQN
+    from cartpole_model import CartpoleModel
+    from cartpole_agent import CartpoleAgent
+    paddle.set_device('cpu')
+    model = CartpoleModel(obs_dim=OBS_DIM, act_dim=act_dim)
+    alg = DQN(model, gamma=0.95, lr=0.001)
+    return CartpoleAgent(alg, act_dim=act_dim, e_greed=0.1, e_greed_decrement=0.0)
+
+
+def build_replay(size, act_dim, seed):
+    """填充了随机转移的 ReplayMemory"""
+    from parl.utils import ReplayMemory
+    rng = np.random.RandomState(seed)
+    rpm = ReplayMemory(size, OBS_DIM, 0)
+    for _ in range(size):
+        rpm.append(rng.uniform(0, 100, OBS_DIM).astype(np.float32), rng.randint(act_dim),
+                   rng.uniform(-10, 12), rng.uniform(0, 100, OBS_DIM).astype(np.float32), rng.rand() < 0.05)
+    return rpm
+
+
+# ---------------------------------------------------------------- 用例 ----
+def case_env_step(args):
+    env = Env(seed=args.seed)
+    env.reset()
+    actions = np.random.randint(env.act_dim, size=1 << 16).tolist()
+    state = {"i": 0}
+
+    def fn():
+        i = state["i"] = (state["i"] + 1) & 0xFFFF
+        if env.step(actions[i])[2]:
+            env.reset()
+    return measure(fn, args.iters, args.warmup)
+
+
+def case_env_reset(args):
+    env = Env(seed=args.seed)
+    return measure(env.reset, args.iters, args.warmup)
+
+
+def case_agent_predict(args):
+    env = Env(seed=args.seed)
+    agent = build_agent(env.act_dim)
+    obs = env.reset()
+    return measure(lambda: agent.predict(obs), args.iters // 10, args.warmup)
+
+
+def case_agent_sample(args):
+    env = Env(seed=args.seed)
+    agent = build_agent(env.act_dim)
+    obs = env.reset()
+    return measure(lambda: agent.sample(obs), args.iters // 10, args.warmup)
+
+
+def case_agent_learn(args):
+    env = Env(seed=args.seed)
+    agent = build_agent(env.act_dim)
+    rpm = build_replay(4 * BATCH_SIZE, env.act_dim, args.seed)
+    batch = rpm.sample_batch(BATCH_SIZE)
+    return measure(lambda: agent.learn(*batch), args.iters // 100, max(1, args.warmup // 10))
+
+
+def case_replay_sample_batch(args):
+    rpm = build_replay(args.replay_size, Env(seed=args.seed).act_dim, args.seed)
+    return measure(lambda: rpm.sample_batch(BATCH_SIZE), args.iters // 10, args.warmup)
+
+
+def case_train_episode(args):
+    train = load_train_module()
+    env = Env(seed=args.seed)
+    agent = build_agent(env.act_dim)
+    rpm = build_replay(train.MEMORY_WARMUP_SIZE + BATCH_SIZE, env.act_dim, args.seed)
+    return measure(lambda: train.run_train_episode(agent, env, rpm), args.episodes, 2)
+
+
+CASES = {
+    "env_step": case_env_step,
+    "env_reset": case_env_reset,
+    "agent_predict": case_agent_predict,
+    "agent_sample": case_agent_sample,
+    "agent_learn": case_agent_learn,
+    "replay_sample_batch": case_replay_sample_batch,
+    "train_episode": case_train_episode,
+}
+
+
+def environment_info():
+    info = {"python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor(), "numpy": np.__version__}
+    try:
+        import paddle
+        info["paddle"] = paddle.__version__
+    except ImportError:
+        pass
+    return info
+
+
+def compare(results, baseline, threshold):
+    """与基线比较 ops/sec，返回回退超过阈值的用例列表"""
+    regressions = []
+    print("\n" + "="*78)
+    print(f"{'case':<22s} {'ops/sec':>14s} {'baseline':>14s} {'change':>9s} {'p50 us':>8s} {'p99 us':>8s}")
+    print("="*78)
+    for name, res in results.items():
+        if "skipped" in res:
+            print(f"{name:<22s} skipped: {res['skipped']}")
+            continue
+        base = baseline.get(name, {}).get("ops_per_sec") if baseline else None
+        if base:
+            change = res["ops_per_sec"] / base - 1.0
+            flag = "  REGRESSION" if change < -threshold else ""
+            if flag:
+                regressions.append(name)
+            print(f"{name:<22s} {res['ops_per_sec']:>14,.1f} {base:>14,.1f} {change:>+8.1%} "
+                  f"{res['p50_us']:>8.1f} {res['p99_us']:>8.1f}{flag}")
+        else:
+            print(f"{name:<22s} {res['ops_per_sec']:>14,.1f} {'-':>14s} {'-':>9s} "
+                  f"{res['p50_us']:>8.1f} {res['p99_us']:>8.1f}")
+    print("="*78 + "\n")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite for env, agent and training hot paths')
+    parser.add_argument('--cases', nargs='+', default=list(CASES), choices=list(CASES), help='Cases to run')
+    parser.add_argument('--iters', type=int, default=20000, help='Timed iterations for the cheapest cases')
+    parser.add_argument('--warmup', type=int, default=200, help='Warmup iterations')
+    parser.add_argument('--episodes', type=int, default=20, help='Timed episodes for train_episode')
+    parser.add_argument('--replay-size', type=int, default=200000, help='Replay size for replay_sample_batch')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--out', type=str, default=DEFAULT_OUT, help='Where to write the JSON results')
+    parser.add_argument('--baseline', type=str, default=DEFAULT_BASELINE, help='Baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed relative ops/sec drop')
+    parser.add_argument('--save-baseline', action='store_true', help='Also write the results as the new baseline')
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.cases:
+        print(f"[RUN] {name}")
+        seed_all(args.seed)
+        try:
+            results[name] = CASES[name](args)
+        except ImportError as e:
+            results[name] = {"skipped": str(e)}
+
+    # 基线与机器相关，不随仓库提交；比较模式下没有基线（或基线中缺少某个用例）视为错误，而不是静默通过
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+    elif not args.save_baseline:
+        print(f"[ERROR] Baseline {args.baseline} not found; create it on this machine with --save-baseline")
+        sys.exit(1)
+    regressions = compare(results, baseline, args.threshold)
+    missing = [name for name, res in results.items()
+               if "skipped" not in res and not (baseline or {}).get(name, {}).get("ops_per_sec")]
+
+    report = {"timestamp": time.strftime('%Y-%m-%d %H:%M:%S'), "seed": args.seed,
+              "environment": environment_info(), "results": results}
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"[OK] Results saved to {args.out}")
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"[OK] Baseline saved to {args.baseline}")
+
+    if args.save_baseline:
+        return
+    if missing:
+        print(f"[ERROR] No baseline for: {', '.join(missing)}; refresh it with --save-baseline")
+    if regressions:
+        print(f"[ERROR] Regressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+    if missing or regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
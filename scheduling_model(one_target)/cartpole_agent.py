@@ -16,6 +16,9 @@ import parl
 import paddle
 import numpy as np
 
+from seeding import make_rng
+from profiling import NULL_TIMER
+
 
 class CartpoleAgent(parl.Agent):        # 代理的实现，并继承自 parl.Agent 类；代理是一个决策者，它与环境互动，观察环境状态，采取动作，并获得奖励。代理的任务是通过学习来优化其策略，以获得最大的累积奖励
     """Agent of Cartpole env.       # 表明该代理是用于与 Cartpole 环境交互的代理
@@ -25,16 +28,18 @@ class CartpoleAgent(parl.Agent):        # 代理的实现，并继承自 parl.Ag
 
     """
 
-    def __init__(self, algorithm, act_dim, e_greed=0.1, e_greed_decrement=0):   # 初始化函数：用于解决问题的算法；动作空间的维度（整数）；ε-greedy策略的ε值，它的默认值是0.1；衰减值默认0
+    def __init__(self, algorithm, act_dim, e_greed=0.1, e_greed_decrement=0, rng=None, update_target_steps=200):   # 初始化函数：用于解决问题的算法；动作空间的维度（整数）；ε-greedy策略的ε值，它的默认值是0.1；衰减值默认0
         super(CartpoleAgent, self).__init__(algorithm)  # 调用了父类 parl.Agent 的构造函数，以初始化代理。它将 algorithm 参数传递给父类的构造函数，这是用于实现代理行为的算法
         assert isinstance(act_dim, int) # 断言语句，用于检查 act_dim 是否是整数类型。如果 act_dim 不是整数，将引发AssertionError异常。这是一种有效的输入参数验证方式
         self.act_dim = act_dim  # 将传入的 act_dim 参数赋值给代理对象的 act_dim 成员变量，以便在后续的方法中使用
 
         self.global_step = 0    # 初始化代理的全局步数
-        self.update_target_steps = 200  # 降低更新频率以稳定Q值估计
+        self.update_target_steps = int(update_target_steps)  # 默认 200：降低更新频率以稳定Q值估计
 
         self.e_greed = e_greed  # 初始ε值
         self.e_greed_decrement = e_greed_decrement  # ε衰减值
+        self.rng = make_rng(rng)    # 探索用的独立随机数流（int/SeedSequence/Generator），不依赖全局 np.random
+        self.timer = NULL_TIMER     # learn 内部的分阶段计时（profiling.PhaseTimer），默认不计时
 
     def sample(self, obs):      # 采样一个动作，以进行探索，通常在ε-greedy策略中使用
         """Sample an action `for exploration` when given an observation     # 当给出观察结果时，对“探索”动作进行采样（采样一个动作，用于探索，根据给定的观察值
@@ -45,12 +50,12 @@ class CartpoleAgent(parl.Agent):        # 代理的实现，并继承自 parl.Ag
         Returns:
             act(int): action    #动作
         """
-        sample = np.random.random()     # 从均匀分布中随机采样一个值（0到1之间）
+        sample = self.rng.random()     # 从均匀分布中随机采样一个值（0到1之间）
         if sample < self.e_greed:       # 如果随机采样的值小于ε（epsilon），进行探索
-            act = np.random.randint(self.act_dim)   # 随机选择一个动作 范围act_dim
+            act = int(self.rng.integers(self.act_dim))   # 随机选择一个动作 范围act_dim
         else:
-            if np.random.random() < 0.01:       # 如果随机采样的值小于0.01，进行探索
-                act = np.random.randint(self.act_dim)       # 随机选择一个动作
+            if self.rng.random() < 0.01:       # 如果随机采样的值小于0.01，进行探索
+                act = int(self.rng.integers(self.act_dim))       # 随机选择一个动作
             else:                       # 否则，根据学到的策略预测动作（若以上两种都不满足
                 act = self.predict(obs)         # 使用predict方法预测动作
         self.e_greed = max(0.01, self.e_greed - self.e_greed_decrement)     # 逐渐减小ε的值 确保代理在训练过程中逐渐依赖于学到的策略而不是随机探索
@@ -70,7 +75,46 @@ class CartpoleAgent(parl.Agent):        # 代理的实现，并继承自 parl.Ag
         act = int(pred_q.argmax())                  # 选择具有最高Q值的动作
         return act                                  # 返回选择的动作
 
-    def learn(self, obs, act, reward, next_obs, terminal):          # 用于更新模型（通常是强化学习算法中的Q值函数）以适应一段时间内的观察和奖励数据
+    def sample_batch(self, obs):    # sample 的批量版本：一次前向计算 + 向量化的 ε-greedy
+        """Sample actions `for exploration` for a batch of observations
+
+        Equivalent to calling `sample` once per row: row i uses the ε that the i-th
+        sequential call would see, and ε is advanced by B decrements in closed form.
+
+        Args:
+            obs(np.float32): shape of (batch_size, obs_dim)
+
+        Returns:
+            act(np.int64): shape of (batch_size,)
+        """
+        obs = np.asarray(obs, dtype='float32').reshape(-1, np.shape(obs)[-1])
+        n = len(obs)
+        # 第 i 次顺序调用使用的 ε：第一次为当前值，之后每次减去衰减值且不低于 0.01
+        e_greed = np.maximum(0.01, self.e_greed - self.e_greed_decrement * np.arange(n))
+        e_greed[:1] = self.e_greed
+        explore = (self.rng.random(n) < e_greed) | (self.rng.random(n) < 0.01)
+        act = self.rng.integers(self.act_dim, size=n)
+        greedy = ~explore
+        if greedy.any():                # 只对需要利用的行做一次前向计算
+            act[greedy] = self.predict_batch(obs[greedy])
+        if n:
+            self.e_greed = max(0.01, self.e_greed - self.e_greed_decrement * n)
+        return act
+
+    def predict_batch(self, obs):   # predict 的批量版本：一次张量转换、一次前向计算
+        """Predict actions for a batch of observations
+
+        Args:
+            obs(np.float32): shape of (batch_size, obs_dim)
+
+        Returns:
+            act(np.int64): shape of (batch_size,)
+        """
+        obs = paddle.to_tensor(np.asarray(obs, dtype='float32').reshape(-1, np.shape(obs)[-1]))
+        pred_q = self.alg.predict(obs)              # (batch_size, act_dim)
+        return pred_q.argmax(axis=-1).numpy().astype(np.int64).reshape(-1)
+
+    def learn(self, obs, act, reward, next_obs, terminal, weights=None):          # 用于更新模型（通常是强化学习算法中的Q值函数）以适应一段时间内的观察和奖励数据
         """Update model with an episode data            # 使用一段时间内的观察和奖励数据更新模型
 
         Args:
@@ -79,14 +123,19 @@ class CartpoleAgent(parl.Agent):        # 代理的实现，并继承自 parl.Ag
             reward(np.float32): shape of (batch_size)
             next_obs(np.float32): shape of (batch_size, obs_dim)
             terminal(np.float32): shape of (batch_size)         # 终止标志
+            weights(np.float32): optional importance weights, shape of (batch_size)   # 优先经验回放的重要性采样权重
 
         Returns:
             loss(float)     # 训练过程中的损失值
+            td(np.float32): shape of (batch_size), only when weights is given   # 每条经验的 TD 误差，用于更新优先级
 
         """
+        timer = self.timer
+        t = timer.clock()
         if self.global_step % self.update_target_steps == 0:
             self.alg.sync_target()          # 定期同步目标网络
         self.global_step += 1               # 更新全局步数
+        t = timer.lap("sync_target", t)
 
         act = np.expand_dims(act, axis=-1)                  # 扩展动作的维度
         reward = np.expand_dims(reward, axis=-1)           # 扩展奖励的维度
@@ -97,8 +146,29 @@ class CartpoleAgent(parl.Agent):        # 代理的实现，并继承自 parl.Ag
         reward = paddle.to_tensor(reward, dtype='float32')
         next_obs = paddle.to_tensor(next_obs, dtype='float32')
         terminal = paddle.to_tensor(terminal, dtype='float32')
-        loss = self.alg.learn(obs, act, reward, next_obs, terminal)      # 使用算法（self.alg）学习，并获取训练过程中的损失值
-        return float(loss)               # 返回损失值
+        t = timer.lap("to_tensor", t)
+        if weights is None:
+            loss = self.alg.learn(obs, act, reward, next_obs, terminal)      # 使用算法（self.alg）学习，并获取训练过程中的损失值
+            loss = float(loss)
+            timer.lap("backward", t)
+            return loss               # 返回损失值
+
+        # 加权版本：与 DQN.learn 相同的目标值，损失为按重要性权重加权的平方 TD 误差
+        weights = paddle.to_tensor(np.expand_dims(weights, axis=-1), dtype='float32')
+        pred_values = self.alg.model(obs)
+        action_onehot = paddle.nn.functional.one_hot(paddle.squeeze(act, axis=-1), num_classes=pred_values.shape[-1])
+        pred_value = paddle.sum(pred_values * action_onehot, axis=1, keepdim=True)
+        with paddle.no_grad():
+            max_v = self.alg.target_model(next_obs).max(1, keepdim=True)
+            target = reward + (1 - terminal) * self.alg.gamma * max_v
+        td = pred_value - target
+        loss = paddle.mean(weights * paddle.square(td))
+        self.alg.optimizer.clear_grad()
+        loss.backward()
+        self.alg.optimizer.step()
+        loss, td = float(loss), td.numpy().reshape(-1)
+        timer.lap("backward", t)
+        return loss, td
     
     def load_model(self, model_path):
         """加载训练好的模型"""
@@ -0,0 +1,178 @@
+"""
+训练断点与恢复：
+- snapshot_* 在训练线程中把模型、目标网络、优化器、CartpoleAgent 的 global_step/e_greed、
+  各随机数流、环境起点池以及经验回放复制为 numpy 数组（只做内存拷贝，耗时为毫秒级）；
+- AsyncCheckpointer 在后台线程中序列化并原子替换检查点文件，训练不等待磁盘写入；
+- load_checkpoint / restore_* 在 --resume 时把状态还原到新建的对象上。
+
+优化器状态的键包含参数名（如 linear_0.w_0_moment1_0），而参数名在不同进程中可能不同，
+因此保存时按参数在 model.parameters() 中的位置重新编号。
+"""
+
+import os
+import pickle
+import threading
+import numpy as np
+
+from prioritized_replay import PrioritizedReplayMemory
+from compact_replay import CompactReplayMemory
+
+
+CHECKPOINT_FILE = "checkpoint.pkl"
+
+
+def _numpy_state(state_dict):
+    return {k: np.array(v) for k, v in state_dict.items()}
+
+
+def _rng_state(rng):
+    return rng.bit_generator.state
+
+
+def _set_rng_state(rng, state):
+    rng.bit_generator.state = state
+
+
+# ---------------------------------------------------------------- agent ----
+def snapshot_agent(agent):
+    alg = agent.alg
+    params = alg.model.parameters()
+    optimizer = {}
+    for key, value in alg.optimizer.state_dict().items():
+        for i, p in enumerate(params):
+            if key.startswith(p.name + "_"):
+                optimizer[(i, key[len(p.name):])] = np.array(value)
+                break
+        else:
+            optimizer[key] = value if not hasattr(value, "numpy") else np.array(value)
+    return {
+        "model": _numpy_state(alg.model.state_dict()),
+        "target_model": _numpy_state(alg.target_model.state_dict()),
+        "optimizer": optimizer,
+        "global_step": agent.global_step,
+        "e_greed": agent.e_greed,
+        "rng": _rng_state(agent.rng),
+    }
+
+
+def restore_agent(agent, state):
+    alg = agent.alg
+    alg.model.set_state_dict(state["model"])
+    alg.target_model.set_state_dict(state["target_model"])
+    params = alg.model.parameters()
+    optimizer = {}
+    for key, value in state["optimizer"].items():
+        if isinstance(key, tuple):
+            index, suffix = key
+            optimizer[params[index].name + suffix] = value
+        else:
+            optimizer[key] = value
+    alg.optimizer.set_state_dict(optimizer)
+    agent.global_step = state["global_step"]
+    agent.e_greed = state["e_greed"]
+    _set_rng_state(agent.rng, state["rng"])
+
+
+# ------------------------------------------------------------------ env ----
+def snapshot_env(env):
+    """单个 Env 在 episode 之间的状态：随机数流与起点采样器的缓存池"""
+    sampler = env.start_sampler
+    return {
+        "rng": _rng_state(env.rng),
+        "pool_pos": sampler._pos[sampler._cursor:].copy(),
+        "pool_mask": sampler._mask[sampler._cursor:].copy(),
+        "accept_rate": sampler._accept_rate,
+    }
+
+
+def restore_env(env, state):
+    _set_rng_state(env.rng, state["rng"])      # env.rng 与采样器共享同一个 Generator
+    sampler = env.start_sampler
+    sampler._pos = state["pool_pos"]
+    sampler._mask = state["pool_mask"]
+    sampler._cursor = 0
+    sampler._accept_rate = state["accept_rate"]
+
+
+# --------------------------------------------------------------- replay ----
+def snapshot_replay(rpm):
+    """经验回放的拷贝与采样随机状态（parl 的 ReplayMemory 使用全局 np.random）；
+    CompactReplayMemory 本身就在磁盘上，只 flush 并记录各条流的写入位置与数量（恢复时丢弃之后写入的经验）"""
+    state = {"np_random": np.random.get_state()}
+    if isinstance(rpm, CompactReplayMemory):
+        rpm.flush()
+        state.update(cursor=rpm._cursor.copy(), sizes=rpm._sizes.copy(), rng=_rng_state(rpm.rng))
+        return state
+    n = rpm._curr_size
+    state.update(size=n, pos=rpm._curr_pos, obs=rpm.obs[:n].copy(), action=rpm.action[:n].copy(),
+                 reward=rpm.reward[:n].copy(), next_obs=rpm.next_obs[:n].copy(),
+                 terminal=rpm.terminal[:n].copy())
+    if isinstance(rpm, PrioritizedReplayMemory):
+        state.update(sum_tree=rpm.tree.sum_tree.copy(), min_tree=rpm.tree.min_tree.copy(),
+                     max_priority=rpm.max_priority, beta=rpm.beta, rng=_rng_state(rpm.rng))
+    return state
+
+
+def restore_replay(rpm, state):
+    """还原经验回放；返回检查点之前、但在之后被覆盖而无法还原的经验条数（只有 CompactReplayMemory 可能非零）"""
+    np.random.set_state(state["np_random"])
+    if isinstance(rpm, CompactReplayMemory):
+        lost = rpm.rewind(state["cursor"], state["sizes"])
+        _set_rng_state(rpm.rng, state["rng"])
+        return lost
+    n = state["size"]
+    for name in ("obs", "action", "reward", "next_obs", "terminal"):
+        getattr(rpm, name)[:n] = state[name]
+    rpm._curr_size = n
+    rpm._curr_pos = state["pos"]
+    if isinstance(rpm, PrioritizedReplayMemory):
+        rpm.tree.sum_tree[:] = state["sum_tree"]
+        rpm.tree.min_tree[:] = state["min_tree"]
+        rpm.max_priority = state["max_priority"]
+        rpm.beta = state["beta"]
+        _set_rng_state(rpm.rng, state["rng"])
+    return 0
+
+
+# ----------------------------------------------------------------- I/O ----
+class AsyncCheckpointer:
+    """后台线程写检查点：save() 接收已拷贝好的状态立即返回；上一次写入未完成时先等待它结束"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, CHECKPOINT_FILE)
+        self._thread = None
+        self.error = None
+
+    def _write(self, state):
+        try:
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)      # 原子替换：崩溃时旧检查点仍然完整
+        except Exception as e:              # 在下一次 save()/wait() 时抛出
+            self.error = e
+
+    def save(self, state):
+        self.wait()
+        self._thread = threading.Thread(target=self._write, args=(state,), daemon=True)
+        self._thread.start()
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+
+def load_checkpoint(directory):
+    path = os.path.join(directory, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
@@ -0,0 +1,194 @@
+import os
+import json
+import numpy as np
+
+from seeding import make_rng
+
+
+META_FILE = "meta.json"
+
+# 每条经验的紧凑字段：(文件名, 每条的形状, dtype)；action 的 dtype 由传感器数量决定
+_FIELDS = (
+    ("pos", (4,), np.float16),      # x_t, y_t, x_{t-1}, y_{t-1}
+    ("last", (), np.uint8),         # last_sensor_id（传感器数量超过 255 时为 uint16）
+    ("lost", (), np.uint8),         # lost_flag
+    ("action", (), np.uint8),
+    ("reward", (), np.float32),
+    ("done", (), np.uint8),
+)
+
+
+class CompactReplayMemory:
+    """np.memmap 支持的紧凑经验回放，可在进程结束后保留，并在下次训练时立即重新打开继续使用。
+
+    每条经验约 16 字节（parl ReplayMemory 为 57 字节）：位置用 float16，传感器编号/丢失标志/动作/done 用 uint8，
+    不单独保存 next_obs —— 第 i 条的 next_obs 就是同一条流中第 i+1 条的 obs（done 时 next_obs 不参与目标值计算）。
+    多个环境交错写入时每个环境使用一条独立的流（stream），各自是一个环形缓冲区；
+    每条流最新写入的一条在下一条到来前没有 next_obs，采样时跳过（done 的除外）。
+
+    append/sample_batch 的签名与 parl 的 ReplayMemory 相同（append 的 next_obs 参数被忽略）。
+    """
+
+    def __init__(self, path, max_size=None, act_dim=None, num_streams=1, seed=None):
+        self.path = path
+        self.rng = make_rng(seed)
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            mode = "r+"
+        else:
+            if max_size is None or act_dim is None:
+                raise ValueError("max_size and act_dim are required to create a new replay at %r" % (path,))
+            os.makedirs(path, exist_ok=True)
+            num_streams = int(num_streams)
+            meta = {"stream_size": -(-int(max_size) // num_streams), "num_streams": num_streams,
+                    "index_dtype": "uint8" if int(act_dim) <= 256 else "uint16"}
+            mode = "w+"
+        self.stream_size = int(meta["stream_size"])
+        self.num_streams = int(meta["num_streams"])
+        self.max_size = self.stream_size * self.num_streams
+        index_dtype = np.dtype(meta["index_dtype"])
+
+        self._arrays = {}
+        for name, shape, dtype in _FIELDS:
+            if name in ("last", "action"):
+                dtype = index_dtype
+            self._arrays[name] = np.lib.format.open_memmap(os.path.join(path, name + ".npy"), mode=mode,
+                                                           dtype=dtype, shape=(self.max_size,) + shape)
+        # 每条流的写入位置与已填充数量，同样保存在磁盘上
+        self._state = np.lib.format.open_memmap(os.path.join(path, "state.npy"), mode=mode,
+                                                dtype=np.int64, shape=(2, self.num_streams))
+        self._cursor, self._sizes = self._state[0], self._state[1]
+        # 打开时磁盘上的写入位置（drop_pending 之前），rewind 用它计算检查点之后写入了多少条
+        self._opened_cursor = None if mode == "w+" else self._cursor.copy()
+        if mode == "w+":
+            with open(meta_path, "w") as f:
+                json.dump(meta, f, indent=2)
+        else:
+            # 上次运行结束时未完成的最后一条经验没有 next_obs，丢弃它，避免与本次的第一条拼接
+            self.drop_pending()
+
+    def drop_pending(self):
+        """丢弃各条流中最新一条尚无 next_obs 的经验（之后写入的经验不是它的后继时调用）"""
+        for s in range(self.num_streams):
+            if self._sizes[s] and not self._arrays["done"][self._newest(s)]:
+                self._cursor[s] = (self._cursor[s] - 1) % self.stream_size
+                self._sizes[s] -= 1
+
+    def rewind(self, cursor, sizes):
+        """回到检查点记录的写入位置（打开之后、写入之前调用）：丢弃检查点之后写入的经验。
+
+        缓冲区已满时，之后的写入覆盖了同样数量的最旧经验，这些位置也从有效范围中去掉；
+        假设两次检查点之间每条流写入的经验少于 stream_size 条。返回因覆盖而丢失的旧经验条数。
+        """
+        if self._opened_cursor is None:
+            raise ValueError("replay at %r was created after the checkpoint; nothing to rewind" % (self.path,))
+        cursor = np.asarray(cursor, dtype=np.int64)
+        sizes = np.asarray(sizes, dtype=np.int64)
+        written = (self._opened_cursor - cursor) % self.stream_size
+        keep = np.minimum(sizes, self.stream_size - written)
+        self._cursor[:] = cursor
+        self._sizes[:] = keep
+        self.drop_pending()
+        return int((sizes - keep).sum())
+
+    def _newest(self, stream):
+        return stream * self.stream_size + (self._cursor[stream] - 1) % self.stream_size
+
+    def __len__(self):
+        return int(self._sizes.sum())
+
+    def size(self):
+        return len(self)
+
+    def _write(self, flat, obs, act, reward, terminal):
+        obs = np.asarray(obs)
+        a = self._arrays
+        a["pos"][flat] = obs[..., 0:4]
+        a["last"][flat] = obs[..., 4]
+        a["lost"][flat] = obs[..., 5]
+        a["action"][flat] = act
+        a["reward"][flat] = reward
+        a["done"][flat] = terminal
+
+    def append(self, obs, act, reward, next_obs, terminal, stream=0):
+        """追加一条经验；next_obs 由同一条流的下一条经验给出，不保存"""
+        c = int(self._cursor[stream])
+        self._write(stream * self.stream_size + c, obs, act, reward, terminal)
+        self._cursor[stream] = (c + 1) % self.stream_size
+        self._sizes[stream] = min(self._sizes[stream] + 1, self.stream_size)
+
+    def append_batch(self, obs, act, reward, next_obs, terminal):
+        """每条流追加一条：第 i 行写入第 i 条流（多个环境同步推进时使用）"""
+        if len(obs) != self.num_streams:
+            raise ValueError("append_batch expects %d rows (one per stream), got %d" % (self.num_streams, len(obs)))
+        flat = np.arange(self.num_streams) * self.stream_size + self._cursor
+        self._write(flat, obs, act, reward, terminal)
+        self._cursor[:] = (self._cursor + 1) % self.stream_size
+        np.minimum(self._sizes + 1, self.stream_size, out=self._sizes)
+
+    def append_steps(self, obs, act, reward, next_obs, terminal):
+        """一次写入 T 步：数组形状为 (T, num_streams, ...)，第 t 行与 append_batch 的第 t 次调用相同"""
+        obs = np.asarray(obs)
+        steps = len(obs)
+        if obs.shape[1] != self.num_streams:
+            raise ValueError("append_steps expects %d columns (one per stream), got %d"
+                             % (self.num_streams, obs.shape[1]))
+        skip = max(0, steps - self.stream_size)
+        offsets = np.arange(skip, steps)[:, None]
+        flat = np.arange(self.num_streams) * self.stream_size + (self._cursor + offsets) % self.stream_size
+        self._write(flat, obs[skip:], np.asarray(act)[skip:], np.asarray(reward)[skip:],
+                    np.asarray(terminal)[skip:])
+        self._cursor[:] = (self._cursor + steps) % self.stream_size
+        np.minimum(self._sizes + steps, self.stream_size, out=self._sizes)
+
+    def _obs(self, flat):
+        a = self._arrays
+        obs = np.empty((len(flat), 6), dtype=np.float32)
+        obs[:, 0:4] = a["pos"][flat]
+        obs[:, 4] = a["last"][flat]
+        obs[:, 5] = a["lost"][flat]
+        return obs
+
+    def make_index(self, batch_size):
+        """均匀采样 batch_size 个有 next_obs 的经验下标"""
+        sizes = self._sizes.astype(np.int64)
+        newest = np.array([self._newest(s) for s in range(self.num_streams)])
+        pending = sizes > 0
+        pending[pending] = self._arrays["done"][newest[pending]] == 0
+        if sizes.sum() - pending.sum() <= 0:
+            raise ValueError("replay memory has no complete transitions yet")
+        ends = np.cumsum(sizes)
+        flat = np.empty(batch_size, dtype=np.int64)
+        todo = np.arange(batch_size)
+        while len(todo):        # 拒绝各条流尚无 next_obs 的最新一条（每条流最多一条，极少重采）
+            u = self.rng.integers(ends[-1], size=len(todo))
+            s = np.searchsorted(ends, u, side="right")
+            # 流内第 k 旧的经验：从最旧的位置 (cursor - size) 起算
+            offset = u - (ends[s] - sizes[s])
+            cand = s * self.stream_size + (self._cursor[s] - sizes[s] + offset) % self.stream_size
+            ok = ~(pending[s] & (cand == newest[s]))
+            flat[todo[ok]] = cand[ok]
+            todo = todo[~ok]
+        return flat
+
+    def sample_batch_by_index(self, batch_idx):
+        batch_idx = np.asarray(batch_idx, dtype=np.int64)
+        stream, j = np.divmod(batch_idx, self.stream_size)
+        next_idx = stream * self.stream_size + (j + 1) % self.stream_size
+        a = self._arrays
+        obs = self._obs(batch_idx)
+        next_obs = self._obs(next_idx)
+        action = a["action"][batch_idx].astype(np.int32)
+        reward = a["reward"][batch_idx]
+        terminal = a["done"][batch_idx].astype(bool)
+        return obs, action, reward, next_obs, terminal
+
+    def sample_batch(self, batch_size):
+        return self.sample_batch_by_index(self.make_index(batch_size))
+
+    def flush(self):
+        for arr in self._arrays.values():
+            arr.flush()
+        self._state.flush()
@@ -0,0 +1,52 @@
+"""
+训练收敛监控：
+- 可选的提前停止（patience > 0 时启用，默认关闭）：基于训练脚本每 100 集计算的指标
+  （探测率、连续丢失概率、切换率）判断是否进入平台期：任一指标相对其历史最优改进超过 tolerance 即视为仍在进步，连续 patience 个窗口都没有改进则认为已收敛；
+- 同时保留最优模型：窗口平均奖励创新高时在内存中复制一份模型参数（毫秒级），
+  训练结束（收敛提前停止或达到 max_episode）时用 restore_best 装回 agent，再保存 model.ckpt / inference_model。
+"""
+
+import numpy as np
+
+
+class ConvergenceMonitor:
+    """每个统计窗口结束时调用 update(episode, avg, agent)，返回 True 表示应当停止训练"""
+
+    # 各指标的改进方向：探测率越高越好，丢失概率与切换率越低越好
+    DIRECTIONS = {"detect_rate": 1.0, "lost_prob": -1.0, "switch_rate": -1.0}
+
+    def __init__(self, patience=0, tolerance=0.005, min_episodes=2000, score_key="reward"):
+        self.patience = int(patience)           # 0（默认）表示只保留最优模型、不提前停止
+        self.tolerance = float(tolerance)
+        self.min_episodes = int(min_episodes)
+        self.score_key = score_key
+        self.best = dict.fromkeys(self.DIRECTIONS, -np.inf)
+        self.stale = 0                          # 连续没有改进的窗口数
+        self.best_score = -np.inf
+        self.best_episode = None
+        self.best_state = None
+
+    def update(self, episode, avg, agent):
+        improved = False
+        for key, sign in self.DIRECTIONS.items():
+            value = sign * float(avg[key])
+            if value > self.best[key] + self.tolerance:
+                improved = True
+            self.best[key] = max(self.best[key], value)
+        self.stale = 0 if improved else self.stale + 1
+
+        score = float(avg[self.score_key])
+        if score > self.best_score:
+            self.best_score = score
+            self.best_episode = episode
+            self.best_state = {k: np.array(v) for k, v in agent.alg.model.state_dict().items()}
+
+        return self.patience > 0 and episode >= self.min_episodes and self.stale >= self.patience
+
+    def restore_best(self, agent):
+        """把最优窗口的模型参数装回 agent（策略网络与目标网络）；没有记录时返回 False"""
+        if self.best_state is None:
+            return False
+        agent.alg.model.set_state_dict(self.best_state)
+        agent.alg.target_model.set_state_dict(self.best_state)
+        return True
@@ -1,12 +1,14 @@
 import os
 import argparse
 import numpy as np
-import matplotlib.pyplot as plt
 import paddle
 from parl.algorithms import DQN
 from cartpole_model import CartpoleModel
 from cartpole_agent import CartpoleAgent
 from Envir import Env
+from parallel_env import make_vector_env
+from seeding import episode_seed
+from report import MODES as REPORT_MODES, dispatch as dispatch_report
 
 
 def load_agent(obs_dim, act_dim):
@@ -29,10 +31,12 @@ def load_agent(obs_dim, act_dim):
     return agent
 
 
-def evaluate(agent, env, num_episodes, max_steps=1000):
+def evaluate(agent, env, num_episodes, max_steps=1000, seed=None):
+    """With a seed, episode ep is reset from episode_seed(seed, ep), so any single
+    episode can be replayed on its own with the same start and velocity."""
     rewards = []
     for ep in range(num_episodes):
-        obs = env.reset()
+        obs = env.reset(seed=None if seed is None else episode_seed(seed, ep))
         total_reward = 0.0
         step = 0
         while True:
@@ -52,36 +56,72 @@ def evaluate(agent, env, num_episodes, max_steps=1000):
     return rewards
 
 
-def plot_rewards(rewards, out_png="eval_rewards.png"):
-    episodes = np.arange(1, len(rewards) + 1)
-    plt.figure(figsize=(8,4))
-    plt.plot(episodes, rewards, '-o', linewidth=1)
-    plt.xlabel('Episode')
-    plt.ylabel('Average Step Reward')
-    plt.title('Evaluation Average Step Reward per Episode')
-    plt.grid(True)
-    plt.tight_layout()
-    plt.savefig(out_png)
-    print(f"Saved reward plot to {out_png}")
+def evaluate_vector(agent, venv, num_episodes):
+    """Same metric as evaluate(), but steps all environments of venv together.
+
+    Every slot contributes a fixed quota of ceil(num_episodes / num_envs) episodes
+    (later ones are ignored), so short episodes are not over-represented by finishing
+    first. Rewards are returned round by round (each slot's 1st episode, then 2nd, ...)
+    and cut to num_episodes. Episodes end by the env's own termination
+    (venv.max_steps bounds their length).
+    """
+    n = venv.num_envs
+    quota = -(-num_episodes // n)
+    obs = venv.reset()
+    total_reward = np.zeros(n)
+    steps = np.zeros(n, dtype=np.int64)
+    per_slot = [[] for _ in range(n)]
+    done_count = 0
+    while done_count < n * quota:
+        # deterministic action for evaluation
+        actions = agent.predict_batch(obs)
+        obs, reward, done, info = venv.step(actions)
+        total_reward += reward
+        steps += 1
+        finished = np.flatnonzero(done)
+        for i in finished:
+            if len(per_slot[i]) >= quota:
+                continue
+            avg_reward = total_reward[i] / steps[i]
+            per_slot[i].append(avg_reward)
+            done_count += 1
+            print(f"Slot {i} episode {len(per_slot[i])}/{quota}: avg_step_reward={avg_reward:.3f}")
+        total_reward[finished] = 0.0
+        steps[finished] = 0
+    rewards = [per_slot[i][r] for r in range(quota) for i in range(n)]
+    return rewards[:num_episodes]
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('--episodes', type=int, default=1000, help='number of evaluation episodes')
     parser.add_argument('--out', type=str, default='eval_rewards.png', help='output png path')
+    parser.add_argument('--num_envs', type=int, default=1, help='environments stepped together (1 = single Env)')
+    parser.add_argument('--num_workers', type=int, default=0, help='worker processes for the environments (0 = in-process)')
+    parser.add_argument('--seed', type=int, default=42, help='root seed; episode i of the single Env uses episode_seed(seed, i)')
+    parser.add_argument('--report', type=str, default='background', choices=REPORT_MODES,
+                        help='render the reward plot in a background process, inline, or not at all (see report.py)')
     args = parser.parse_args()
 
-    env = Env()
+    env = Env(seed=args.seed)
     obs_dim = 6  # obs = [x_t, y_t, x_{t-1}, y_{t-1}, last_sensor_id, lost_flag]
     act_dim = env.act_dim  # 自动从环境获取（传感器数量）
 
     agent = load_agent(obs_dim, act_dim)
 
-    rewards = evaluate(agent, env, args.episodes)
+    if args.num_envs > 1:
+        venv = make_vector_env(args.num_envs, num_workers=args.num_workers, seed=args.seed)
+        rewards = evaluate_vector(agent, venv, args.episodes)
+        venv.close()
+    else:
+        rewards = evaluate(agent, env, args.episodes, seed=args.seed)
 
     mean = np.mean(rewards)
     std = np.std(rewards)
     print(f"Evaluation result over {len(rewards)} episodes: mean_avg_step_reward={mean:.3f}, std={std:.3f}")
 
-    plot_rewards(rewards, out_png=args.out)
+    # 先保存奖励数据，绘图由 report.py 完成（默认在后台进程中）
+    rewards_path = os.path.splitext(args.out)[0] + '.npy'
+    np.save(rewards_path, np.asarray(rewards))
+    dispatch_report(args.report, ['eval', '--rewards', rewards_path, '--out', args.out])
 
@@ -0,0 +1,115 @@
+"""
+Paddle Inference 推理：加载 train(2).py 导出的静态图（inference_model.pdmodel / .pdiparams），
+用 paddle.inference 的 predictor 执行前向，不构建动态图模型，也不导入 parl。
+
+- 只用 CPU，计算线程数可配置（控制板上默认 1 个线程，避免与串口/控制循环争用核）；
+- 开启 IR 图优化（算子融合）与内存复用；
+- 输入/输出句柄在加载时取得一次并复用，单步决策复用同一块 (1, obs_dim) 输入缓冲区；
+- 加载时先做若干次前向（warmup），第一次真实决策不承担初始化与内存分配的开销。
+
+接口与 numpy_policy.Policy 相同（q_values/act/act_batch/predict/predict_batch），可直接替换 agent。
+
+测量单步延迟（可与 policy.npz 的 NumPy 前向对比结果与耗时）：
+  python inference_runtime.py --model ./inference_model --threads 1 --iters 2000 --npz policy.npz
+"""
+
+import time
+import argparse
+import numpy as np
+
+
+class InferencePolicy:
+    """paddle.inference predictor 的贪心策略；model_prefix 为 save_inference_model 的保存路径（不含扩展名）"""
+
+    def __init__(self, model_prefix='./inference_model', cpu_threads=1, ir_optim=True, warmup=10, obs_dim=6):
+        from paddle import inference    # 只在使用静态图推理时需要 paddle
+
+        config = inference.Config(model_prefix + '.pdmodel', model_prefix + '.pdiparams')
+        config.disable_gpu()
+        config.set_cpu_math_library_num_threads(int(cpu_threads))
+        config.switch_ir_optim(bool(ir_optim))
+        config.enable_memory_optim()
+        config.disable_glog_info()
+        self.predictor = inference.create_predictor(config)
+        self.input = self.predictor.get_input_handle(self.predictor.get_input_names()[0])
+        self.output = self.predictor.get_output_handle(self.predictor.get_output_names()[0])
+
+        self.obs_dim = int(obs_dim)
+        self._obs = np.zeros((1, self.obs_dim), dtype=np.float32)     # 单步决策复用的输入缓冲区
+        self._rows = None                                             # 输入句柄当前的 batch 大小
+        self.act_dim = self.q_values(self._obs).shape[1]
+        for _ in range(int(warmup)):
+            self.q_values(self._obs)
+
+    def _run(self, obs):
+        rows = obs.shape[0]
+        if rows != self._rows:      # batch 大小不变时不重新 reshape
+            self.input.reshape([rows, self.obs_dim])
+            self._rows = rows
+        self.input.copy_from_cpu(obs)
+        self.predictor.run()
+        return self.output.copy_to_cpu()
+
+    def q_values(self, obs):
+        """Q 值：obs (B, obs_dim) -> (B, act_dim)"""
+        return self._run(np.ascontiguousarray(obs, dtype=np.float32).reshape(-1, self.obs_dim))
+
+    def act_batch(self, obs):
+        """批量贪心动作：obs (B, obs_dim) -> (B,)"""
+        return self.q_values(obs).argmax(axis=1)
+
+    def act(self, obs):
+        """单个观测的贪心动作"""
+        self._obs[0] = obs
+        return int(self._run(self._obs)[0].argmax())
+
+    # 与 CartpoleAgent 同名的接口，仿真/评估脚本可直接替换 agent
+    predict = act
+    predict_batch = act_batch
+
+
+def measure_latency(policy, obs, iters=2000):
+    """逐个观测调用 policy.act，返回每次决策耗时（微秒）"""
+    times = np.empty(iters)
+    for i in range(iters):
+        start = time.perf_counter_ns()
+        policy.act(obs[i % len(obs)])
+        times[i] = (time.perf_counter_ns() - start) / 1e3
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-decision latency of the Paddle Inference predictor')
+    parser.add_argument('--model', type=str, default='./inference_model', help='prefix saved by save_inference_model')
+    parser.add_argument('--threads', type=int, default=1, help='CPU math library threads')
+    parser.add_argument('--no-ir-optim', action='store_true', help='disable IR graph optimization')
+    parser.add_argument('--warmup', type=int, default=10, help='forward passes at load time')
+    parser.add_argument('--iters', type=int, default=2000, help='timed single-observation decisions')
+    parser.add_argument('--npz', type=str, default='', help='policy.npz to compare actions and latency with')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    policy = InferencePolicy(args.model, cpu_threads=args.threads, ir_optim=not args.no_ir_optim,
+                             warmup=args.warmup)
+    print(f"loaded {args.model} in {(time.perf_counter() - start) * 1e3:.0f} ms "
+          f"(threads={args.threads}, ir_optim={not args.no_ir_optim}, warmup={args.warmup})")
+
+    rng = np.random.default_rng(args.seed)
+    obs = np.column_stack([rng.uniform(0, 100, (args.iters, 4)), rng.integers(0, policy.act_dim, args.iters),
+                           rng.integers(0, 2, args.iters)]).astype(np.float32)
+    runners = [("paddle inference", policy)]
+    if args.npz:
+        from numpy_policy import Policy
+        reference = Policy(args.npz)
+        agreement = float(np.mean(policy.act_batch(obs) == reference.act_batch(obs)))
+        print(f"action agreement with {args.npz}: {agreement * 100:.2f}%")
+        runners.append(("numpy", reference))
+    for name, runner in runners:
+        times = measure_latency(runner, obs, args.iters)
+        print(f"{name:>16s}: p50 {np.percentile(times, 50):.1f} us, p99 {np.percentile(times, 99):.1f} us, "
+              f"max {times.max():.1f} us")
+
+
+if __name__ == '__main__':
+    main()
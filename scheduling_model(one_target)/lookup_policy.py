@@ -0,0 +1,198 @@
+"""
+把训练好的 Q 网络编译为查找表：在 (x, y, vx, vy) 网格 × 上一个传感器 × 丢失标志 上
+一次性向量化扫描网络，保存每个格点的贪心动作（以及可选的 Q 值，用于多线性插值）。
+表以 .npy 形式内存映射加载，实时路径中 act(obs) 只做一次下标计算和一次查表，与网络大小无关。
+
+obs = [x_t, y_t, x_{t-1}, y_{t-1}, last_sensor_id, lost_flag]，速度取 (x_t - x_{t-1}, y_t - y_{t-1})；
+超出网格范围的坐标截断到边界。
+
+使用示例：
+  python lookup_policy.py --npz policy.npz --out policy_table
+  python lookup_policy.py --npz policy.npz --out policy_table --pos-bins 101 --vel-bins 21 --store-q
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+
+from Envir import Env
+from numpy_policy import Policy
+from seeding import episode_seed
+
+
+ACTIONS_FILE = "actions.npy"
+Q_FILE = "q.npy"
+META_FILE = "meta.json"
+
+
+def _axes(meta):
+    pos = np.linspace(meta["pos_low"], meta["pos_high"], meta["pos_bins"])
+    vel = np.linspace(meta["vel_low"], meta["vel_high"], meta["vel_bins"])
+    return pos, vel
+
+
+def compile_table(policy, out_dir, num_sensors, pos_bins=51, vel_bins=11, pos_range=(0.0, 100.0),
+                  vel_range=(-5.0, 5.0), store_q=False, chunk=1 << 16):
+    """扫描整个网格并写出内存映射表。policy 需提供 q_values(obs (B, 6)) -> (B, act_dim)"""
+    os.makedirs(out_dir, exist_ok=True)
+    meta = {"pos_low": float(pos_range[0]), "pos_high": float(pos_range[1]), "pos_bins": int(pos_bins),
+            "vel_low": float(vel_range[0]), "vel_high": float(vel_range[1]), "vel_bins": int(vel_bins),
+            "num_sensors": int(num_sensors), "act_dim": int(policy.act_dim)}
+    pos, vel = _axes(meta)
+    shape = (pos_bins, pos_bins, vel_bins, vel_bins, num_sensors, 2)
+
+    actions = np.lib.format.open_memmap(os.path.join(out_dir, ACTIONS_FILE), mode="w+",
+                                        dtype=np.uint8, shape=shape)
+    q_table = None
+    if store_q:
+        q_table = np.lib.format.open_memmap(os.path.join(out_dir, Q_FILE), mode="w+",
+                                            dtype=np.float16, shape=shape + (policy.act_dim,))
+
+    flat_actions = actions.reshape(-1)
+    flat_q = q_table.reshape(-1, policy.act_dim) if store_q else None
+    total = flat_actions.size
+    for start in range(0, total, chunk):
+        idx = np.unravel_index(np.arange(start, min(start + chunk, total)), shape)
+        x, y = pos[idx[0]], pos[idx[1]]
+        obs = np.stack([x, y, x - vel[idx[2]], y - vel[idx[3]], idx[4], idx[5]], axis=1).astype(np.float32)
+        q = policy.q_values(obs)
+        flat_actions[start:start + len(obs)] = q.argmax(axis=1)
+        if store_q:
+            flat_q[start:start + len(obs)] = q
+    actions.flush()
+    if store_q:
+        q_table.flush()
+    with open(os.path.join(out_dir, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+    return out_dir
+
+
+class LookupPolicy:
+    """内存映射的贪心动作表，接口与 Policy/agent.predict 相同。
+
+    interpolate=True（需要编译时 --store-q）时对 (x, y, vx, vy) 做 16 角点多线性插值后取 argmax，
+    否则直接查最近格点的动作。
+    """
+
+    def __init__(self, table_dir, interpolate=False):
+        with open(os.path.join(table_dir, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.actions = np.load(os.path.join(table_dir, ACTIONS_FILE), mmap_mode="r")
+        self.q_table = None
+        if interpolate:
+            self.q_table = np.load(os.path.join(table_dir, Q_FILE), mmap_mode="r")
+        self.obs_dim = 6
+        self.act_dim = self.meta["act_dim"]
+
+        m = self.meta
+        self._lo = np.array([m["pos_low"], m["pos_low"], m["vel_low"], m["vel_low"]])
+        self._step = np.array([(m["pos_high"] - m["pos_low"]) / max(m["pos_bins"] - 1, 1)] * 2 +
+                              [(m["vel_high"] - m["vel_low"]) / max(m["vel_bins"] - 1, 1)] * 2)
+        self._max = np.array([m["pos_bins"] - 1] * 2 + [m["vel_bins"] - 1] * 2)
+        # 标量路径用的 Python 常量
+        self._p_lo, self._p_step, self._p_max = m["pos_low"], float(self._step[0]), m["pos_bins"] - 1
+        self._v_lo, self._v_step, self._v_max = m["vel_low"], float(self._step[2]), m["vel_bins"] - 1
+        self._s_max = m["num_sensors"] - 1
+        # 多线性插值的 16 个角点偏移
+        self._corners = np.array(np.meshgrid(*[[0, 1]] * 4, indexing="ij")).reshape(4, -1).T
+
+    def _features(self, obs):
+        obs = np.asarray(obs, dtype=np.float64).reshape(-1, 6)
+        feats = np.stack([obs[:, 0], obs[:, 1], obs[:, 0] - obs[:, 2], obs[:, 1] - obs[:, 3]], axis=1)
+        grid = np.clip((feats - self._lo) / self._step, 0, self._max)
+        sensor = np.clip(obs[:, 4].astype(np.int64), 0, self._s_max)
+        lost = (obs[:, 5] > 0.5).astype(np.int64)
+        return grid, sensor, lost
+
+    def q_values(self, obs):
+        """多线性插值的 Q 值 (B, act_dim)，需要编译时保存了 Q 表"""
+        if self.q_table is None:
+            raise ValueError("table was loaded without interpolate=True (or compiled without --store-q)")
+        grid, sensor, lost = self._features(obs)
+        lo = np.minimum(np.floor(grid).astype(np.int64), np.maximum(self._max - 1, 0))
+        frac = grid - lo
+        q = np.zeros((len(grid), self.act_dim))
+        for c in self._corners:
+            idx = np.minimum(lo + c, self._max)
+            w = np.prod(np.where(c == 1, frac, 1.0 - frac), axis=1)
+            q += w[:, None] * self.q_table[idx[:, 0], idx[:, 1], idx[:, 2], idx[:, 3], sensor, lost]
+        return q
+
+    def act_batch(self, obs):
+        if self.q_table is not None:
+            return self.q_values(obs).argmax(axis=1)
+        grid, sensor, lost = self._features(obs)
+        idx = np.rint(grid).astype(np.int64)
+        return self.actions[idx[:, 0], idx[:, 1], idx[:, 2], idx[:, 3], sensor, lost].astype(np.int64)
+
+    def act(self, obs):
+        if self.q_table is not None:
+            return int(self.act_batch(obs)[0])
+        x, y, xp, yp, s, lost = (float(v) for v in obs)
+        i = min(max(int(round((x - self._p_lo) / self._p_step)), 0), self._p_max)
+        j = min(max(int(round((y - self._p_lo) / self._p_step)), 0), self._p_max)
+        k = min(max(int(round((x - xp - self._v_lo) / self._v_step)), 0), self._v_max)
+        l = min(max(int(round((y - yp - self._v_lo) / self._v_step)), 0), self._v_max)
+        s = min(max(int(s), 0), self._s_max)
+        return int(self.actions[i, j, k, l, s, 1 if lost > 0.5 else 0])
+
+    predict = act
+    predict_batch = act_batch
+
+
+def measure_agreement(table, policy, seed=0, episodes=100, samples=100000):
+    """与网络的一致率：网格范围内均匀随机的观测，以及网络自身驱动 Env 时实际访问的观测"""
+    rng = np.random.default_rng(seed)
+    m = table.meta
+    n = int(samples)
+    x = rng.uniform(m["pos_low"], m["pos_high"], size=(n, 2))
+    v = rng.uniform(m["vel_low"], m["vel_high"], size=(n, 2))
+    obs = np.concatenate([x, x - v, rng.integers(m["num_sensors"], size=(n, 1)),
+                          rng.integers(2, size=(n, 1))], axis=1).astype(np.float32)
+    uniform = float((table.act_batch(obs) == policy.act_batch(obs)).mean())
+
+    env = Env(seed=seed)
+    visited = []
+    for ep in range(episodes):
+        o = env.reset(seed=episode_seed(seed, ep))
+        done = False
+        while not done:
+            visited.append(o)
+            o, _, done, _ = env.step(policy.act(o))
+    visited = np.asarray(visited, dtype=np.float32)
+    on_policy = float((table.act_batch(visited) == policy.act_batch(visited)).mean())
+    return {"uniform_agreement": uniform, "on_policy_agreement": on_policy, "on_policy_steps": len(visited)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile the Q-network into a memory-mapped greedy-action table')
+    parser.add_argument('--npz', type=str, default='policy.npz', help='weights exported by numpy_policy.py')
+    parser.add_argument('--out', type=str, default='policy_table', help='output directory')
+    parser.add_argument('--pos-bins', type=int, default=51, help='grid points per position axis')
+    parser.add_argument('--vel-bins', type=int, default=11, help='grid points per velocity axis')
+    parser.add_argument('--pos-range', type=float, nargs=2, default=[0.0, 100.0])
+    parser.add_argument('--vel-range', type=float, nargs=2, default=[-5.0, 5.0])
+    parser.add_argument('--store-q', action='store_true', help='also store float16 Q-values for interpolation')
+    parser.add_argument('--episodes', type=int, default=100, help='episodes for the on-policy agreement check')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    policy = Policy(args.npz)
+    num_sensors = Env(seed=args.seed).act_dim
+    compile_table(policy, args.out, num_sensors, pos_bins=args.pos_bins, vel_bins=args.vel_bins,
+                  pos_range=args.pos_range, vel_range=args.vel_range, store_q=args.store_q)
+    size = sum(os.path.getsize(os.path.join(args.out, f)) for f in os.listdir(args.out))
+    print(f"[OK] Table saved to {args.out} ({size / 2**20:.1f} MB)")
+
+    tables = [("nearest", LookupPolicy(args.out))]
+    if args.store_q:
+        tables.append(("interpolated", LookupPolicy(args.out, interpolate=True)))
+    for name, table in tables:
+        res = measure_agreement(table, policy, seed=args.seed, episodes=args.episodes)
+        print(f"{name:>12s}: uniform agreement {res['uniform_agreement']*100:.2f}%, "
+              f"on-policy agreement {res['on_policy_agreement']*100:.2f}% ({res['on_policy_steps']} steps)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+流式训练指标：
+- MetricsWriter：按 episode 追加记录到 JSONL 或 CSV 文件（按扩展名选择），带缓冲并定期 flush，
+  训练过程中不在内存中保留历史；
+- RollingStats：固定窗口的滑动平均与全程均值，内存占用与训练长度无关；
+- load_metrics：把指标文件读回为按列的 numpy 数组，用于事后绘图。
+"""
+
+import os
+import csv
+import json
+import time
+import numpy as np
+
+
+class MetricsWriter:
+    """追加写入的指标文件：*.csv 为 CSV（首条记录决定列），其他扩展名为 JSONL。
+
+    resume_offset：从检查点恢复时，先把文件截断到检查点时刻的长度（见 tell()），再继续追加。
+    """
+
+    def __init__(self, path, flush_every=100, flush_secs=10.0, append=False, resume_offset=None):
+        self.path = path
+        self.flush_every = int(flush_every)
+        self.flush_secs = float(flush_secs)
+        self.is_csv = path.endswith(".csv")
+        if resume_offset is not None and os.path.exists(path):
+            append = True
+            with open(path, "r+b") as f:
+                f.truncate(resume_offset)
+        existing = append and os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, "a" if existing else "w", newline="", buffering=1 << 16)
+        self._csv = None
+        self._fields = None
+        if self.is_csv and existing:
+            with open(path, newline="") as f:
+                self._fields = next(csv.reader(f))
+            self._csv = csv.DictWriter(self._file, fieldnames=self._fields, extrasaction="ignore")
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, record):
+        if self.is_csv:
+            if self._csv is None:
+                self._fields = list(record)
+                self._csv = csv.DictWriter(self._file, fieldnames=self._fields, extrasaction="ignore")
+                self._csv.writeheader()
+            self._csv.writerow(record)
+        else:
+            self._file.write(json.dumps(record) + "\n")
+        self._pending += 1
+        if self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_secs:
+            self.flush()
+
+    def flush(self):
+        self._file.flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def tell(self):
+        """flush 后的文件长度（字节），保存到检查点中"""
+        self.flush()
+        return self._file.tell()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RollingStats:
+    """各指标最近 window 条记录的均值（环形缓冲区）以及全程均值"""
+
+    def __init__(self, keys, window=100):
+        self.keys = tuple(keys)
+        self.window = int(window)
+        self._ring = np.zeros((self.window, len(self.keys)))
+        self._sum = np.zeros(len(self.keys))
+        self.count = 0
+
+    def update(self, record):
+        row = np.array([float(record[k]) for k in self.keys])
+        self._ring[self.count % self.window] = row
+        self._sum += row
+        self.count += 1
+
+    def mean(self):
+        """滑动窗口均值：{指标: 值}"""
+        n = min(self.count, self.window)
+        values = self._ring[:n].mean(axis=0) if n else np.full(len(self.keys), np.nan)
+        return dict(zip(self.keys, values.tolist()))
+
+    def total_mean(self):
+        values = self._sum / self.count if self.count else np.full(len(self.keys), np.nan)
+        return dict(zip(self.keys, values.tolist()))
+
+
+def load_metrics(path):
+    """读取 MetricsWriter 写出的文件：返回 {列名: numpy 数组}"""
+    columns = {}
+    with open(path, newline="") as f:
+        rows = csv.DictReader(f) if path.endswith(".csv") else (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            for key, value in row.items():
+                columns.setdefault(key, []).append(np.nan if value in ("", None) else float(value))
+    return {key: np.asarray(values) for key, values in columns.items()}
+
+
+def block_means(values, block=100):
+    """每 block 条记录的均值（不足一个 block 的尾部丢弃），与训练时每 100 集打印的指标一致"""
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values) // block
+    return values[:n * block].reshape(n, block).mean(axis=1)
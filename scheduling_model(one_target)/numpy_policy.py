@@ -0,0 +1,106 @@
+"""
+纯 NumPy 推理：把 CartpoleModel（fc1..fc4 全连接 + ReLU）的参数从 model.ckpt 导出为 .npz，
+运行时只依赖 numpy，不导入 paddle/parl，适合控制板上的实时循环。
+
+导出（需要 paddle，只在训练机器上执行一次）：
+  python numpy_policy.py --ckpt model.ckpt --out policy.npz
+
+使用：
+  from numpy_policy import Policy
+  policy = Policy("policy.npz")
+  action = policy.act(obs)              # obs (6,) -> int
+  actions = policy.act_batch(obs_batch) # obs (B, 6) -> (B,)
+"""
+
+import argparse
+import numpy as np
+
+
+LAYERS = ("fc1", "fc2", "fc3", "fc4")   # 与 CartpoleModel 的层名一致，最后一层不加 ReLU
+
+
+def arrays_from_state(state, dtype=np.float32):
+    """从 CartpoleModel 的 state_dict（paddle 张量或 numpy 数组）中取出 fc1..fc4 的权重与偏置"""
+    arrays = {}
+    for name in LAYERS:
+        # paddle.nn.Linear 的 weight 形状为 (in, out)，前向为 x @ W + b
+        arrays[name + ".weight"] = np.asarray(state[name + ".weight"], dtype=dtype)
+        arrays[name + ".bias"] = np.asarray(state[name + ".bias"], dtype=dtype)
+    return arrays
+
+
+def export_npz(ckpt_path, out_path, dtype=np.float32):
+    """读取 paddle 保存的 state_dict（agent.save 生成的 model.ckpt），写出 fc1..fc4 的权重与偏置"""
+    import paddle   # 只有导出时需要 paddle
+
+    np.savez(out_path, **arrays_from_state(paddle.load(ckpt_path), dtype))
+    return out_path
+
+
+class Policy:
+    """CartpoleModel 的 NumPy 前向实现，接口与 agent.predict 兼容（predict/act 返回贪心动作）。
+
+    也可加载 quantize.py 生成的 int8（按输出通道缩放）/float16 权重：量化只用于存储与传输，
+    加载时按通道一次还原为 float32（W = W_q * scale），前向与 float32 模型的速度相同。
+    """
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.set_weights({k: data[k] for k in data.files})
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """由 {"fc1.weight": ..., "fc1.bias": ..., ...} 直接构造（不经过文件）"""
+        policy = cls.__new__(cls)
+        policy.set_weights(arrays)
+        return policy
+
+    def set_weights(self, arrays):
+        """替换全部参数（actor 刷新权重时使用）"""
+        self.weights, self.biases = [], []
+        for name in LAYERS:
+            w = arrays[name + ".weight"].astype(np.float32)
+            scale = arrays.get(name + ".weight_scale")
+            if scale is not None:
+                w *= scale
+            self.weights.append(np.ascontiguousarray(w))
+            self.biases.append(np.ascontiguousarray(arrays[name + ".bias"], dtype=np.float32))
+        self.dtype = np.float32
+        self.obs_dim = self.weights[0].shape[0]
+        self.act_dim = self.weights[-1].shape[1]
+
+    @property
+    def nbytes(self):
+        """常驻内存中的参数字节数"""
+        return int(sum(a.nbytes for a in self.weights + self.biases))
+
+    def q_values(self, obs):
+        """Q 值：obs (B, obs_dim) -> (B, act_dim)"""
+        h = np.asarray(obs, dtype=self.dtype).reshape(-1, self.obs_dim)
+        last = len(self.weights) - 1
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            h = h @ w
+            h += b
+            if i < last:
+                np.maximum(h, 0, out=h)     # ReLU
+        return h
+
+    def act_batch(self, obs):
+        """批量贪心动作：obs (B, obs_dim) -> (B,)"""
+        return self.q_values(obs).argmax(axis=1)
+
+    def act(self, obs):
+        """单个观测的贪心动作"""
+        return int(self.q_values(obs)[0].argmax())
+
+    # 与 CartpoleAgent 同名的接口，仿真/评估脚本可直接替换 agent
+    predict = act
+    predict_batch = act_batch
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export CartpoleModel weights from model.ckpt to a NumPy .npz')
+    parser.add_argument('--ckpt', type=str, default='model.ckpt', help='state_dict saved by agent.save')
+    parser.add_argument('--out', type=str, default='policy.npz', help='output .npz path')
+    args = parser.parse_args()
+    print(f"[OK] Exported {export_npz(args.ckpt, args.out)}")
@@ -6,15 +6,12 @@ import os
 import random
 import numpy as np
 import csv
-from parl.env import CompatWrapper
-from cartpole_model import CartpoleModel
-from cartpole_agent import CartpoleAgent
-from parl.algorithms import DQN  # 导入 DQN 算法
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 
-# 加载环境
-from Envir import Env
+# 纯 NumPy 推理（不导入 paddle/parl，实时循环可立即启动）
+from numpy_policy import Policy
+from lookup_policy import LookupPolicy
 import BaseCtrl
 import lora
 import fake_device
@@ -33,6 +30,10 @@ pre_sensor = 1
 
 # 顶部添加
 _agent_cache = None
+TABLE_PATH = './policy_table'       # lookup_policy.py 编译的动作查找表（O(1) 查表，优先使用）
+POLICY_PATH = './policy.npz'        # numpy_policy.py 导出的权重
+INFERENCE_PATH = './inference_model'  # train(2).py 导出的静态图，用 Paddle Inference 执行；都不存在时回退到 model.ckpt
+INFERENCE_THREADS = 1               # Paddle Inference 的 CPU 计算线程数
 
 class Visualizer:
     def __init__(self, sensors):
@@ -80,35 +81,50 @@ def load_model_once():
     if _agent_cache is not None:
         return _agent_cache
 
-    # 创建模型
-    obs_dim = 4
-    act_dim = 3
-    model = CartpoleModel(obs_dim=obs_dim, act_dim=act_dim)
+    if os.path.isdir(TABLE_PATH):
+        agent = LookupPolicy(TABLE_PATH)
+    elif os.path.exists(POLICY_PATH):
+        agent = Policy(POLICY_PATH)
+    elif os.path.exists(INFERENCE_PATH + '.pdmodel'):
+        # 静态图推理：加载时完成图优化与预热，实时循环中的单步延迟稳定
+        from inference_runtime import InferencePolicy
+        agent = InferencePolicy(INFERENCE_PATH, cpu_threads=INFERENCE_THREADS)
+    else:
+        # 回退：用 paddle 加载 model.ckpt（启动慢，仅在没有导出 .npz 与 inference_model 时使用）
+        from cartpole_model import CartpoleModel
+        from cartpole_agent import CartpoleAgent
+        from parl.algorithms import DQN
+
+        # 创建模型：obs = [x_t, y_t, x_{t-1}, y_{t-1}, last_sensor_id, lost_flag]
+        obs_dim = 6
+        act_dim = 3
+        model = CartpoleModel(obs_dim=obs_dim, act_dim=act_dim)
 
-    # 设置 DQN 参数
-    gamma = 0.99
-    lr = 1e-3
-    algorithm = DQN(model, gamma=gamma, lr=lr)
+        # 设置 DQN 参数
+        gamma = 0.99
+        lr = 1e-3
+        algorithm = DQN(model, gamma=gamma, lr=lr)
 
-    # 创建 agent 并加载模型
-    agent = CartpoleAgent(algorithm=algorithm, act_dim=act_dim)
-    agent.load_model('./inference_model')
+        # 创建 agent 并加载模型
+        agent = CartpoleAgent(algorithm=algorithm, act_dim=act_dim, e_greed=0.0)
+        agent.load_model('./model.ckpt')
 
     _agent_cache = agent
     return agent
 
 def predict(latest_location, speed, direction):
-    # 创建环境
-    env = Env(target_start_position=latest_location, target_direction=direction, target_speed=speed)
-
-    # 获取初始状态
-    obs = env.get_initial_obs()
+    # 由当前位置、速度与方向（direction[0] 为相对 y 轴的水平角，单位度）反推上一时刻位置，构造观测
+    heading = math.radians(direction[0])
+    prev_x = latest_location[0] - speed * math.sin(heading)
+    prev_y = latest_location[1] - speed * math.cos(heading)
+    last_sensor = min(max(pre_sensor - 1, 0), 2)
+    obs = np.array([latest_location[0], latest_location[1], prev_x, prev_y, last_sensor, 0], dtype=np.float32)
 
     # 使用已加载的 agent
     agent = load_model_once()
 
-    # 推理得到动作
-    action = agent.sample(obs)
+    # 推理得到动作（贪心）
+    action = agent.predict(obs)
     return action
 
 def receive_from_serial(ser, use_mock=False):
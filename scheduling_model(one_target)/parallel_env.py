@@ -0,0 +1,194 @@
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+from Envir import VectorEnv
+from seeding import spawn_seeds
+
+
+# 共享内存中的数组字段：(名称, 每个环境的形状, dtype)
+_FIELDS = (
+    ("actions", (), np.int64),
+    ("obs", (6,), np.float32),
+    ("final_obs", (6,), np.float32),
+    ("reward", (), np.float64),
+    ("done", (), np.bool_),
+    ("detect", (), np.bool_),
+    ("dist", (), np.float64),
+    ("lost_steps", (), np.int64),
+)
+
+# 管道上只传递单字节命令，数据全部经由共享内存
+_CMD_STEP = b"s"
+_CMD_RESET = b"r"
+_CMD_CLOSE = b"c"
+_ACK = b"k"
+
+
+def _attach(name):
+    """子进程中按名称挂接共享内存（创建与释放都由父进程负责）"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13：子进程与父进程共用同一个 resource_tracker，重复登记无副作用
+        return shared_memory.SharedMemory(name=name)
+
+
+def _views(shms, num_envs, lo, hi):
+    """把各共享内存块映射为 (num_envs, ...) 数组，并截取 [lo, hi) 这一段"""
+    return {
+        name: np.ndarray((num_envs,) + shape, dtype=dtype, buffer=shms[name].buf)[lo:hi]
+        for name, shape, dtype in _FIELDS
+    }
+
+
+def _worker(conn, shm_names, num_envs, lo, hi, env_kwargs):
+    shms = {name: _attach(shm_name) for name, shm_name in shm_names.items()}
+    arrays = _views(shms, num_envs, lo, hi)
+    venv = VectorEnv(hi - lo, **env_kwargs)
+    try:
+        while True:
+            cmd = conn.recv_bytes()
+            if cmd == _CMD_STEP:
+                obs, reward, done, info = venv.step(arrays["actions"])
+                arrays["obs"][:] = obs
+                arrays["final_obs"][:] = info["final_obs"]
+                arrays["reward"][:] = reward
+                arrays["done"][:] = done
+                arrays["detect"][:] = info["detect"]
+                arrays["dist"][:] = info["dist"]
+                arrays["lost_steps"][:] = info["lost_steps"]
+            elif cmd == _CMD_RESET:
+                arrays["obs"][:] = venv.reset()
+            elif cmd == _CMD_CLOSE:
+                break
+            conn.send_bytes(_ACK)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del arrays
+        for shm in shms.values():
+            shm.close()
+        conn.close()
+
+
+class SubprocVectorEnv:
+    """多进程批量环境：num_workers 个子进程各自托管一个 VectorEnv 块（envs_per_worker 个环境）。
+
+    观测、奖励、done 等由子进程直接写入 multiprocessing.shared_memory 数组，
+    进程间只通过管道传递单字节的 step/reset 命令做同步，没有任何数据被 pickle。
+    接口与 VectorEnv 相同：reset() -> obs (N, 6)；step(actions) -> obs, reward, done, info，
+    结束的槽位自动 reset，终止时刻的 obs 在 info["final_obs"] 中。
+    """
+
+    def __init__(self, num_workers, envs_per_worker, seed=42, context=None, **env_kwargs):
+        self.num_workers = int(num_workers)
+        self.envs_per_worker = int(envs_per_worker)
+        self.num_envs = self.num_workers * self.envs_per_worker
+
+        # 在主进程中构造一个仅用于读取配置的环境（act_dim、传感器布局等）
+        probe = VectorEnv(1, seed=None, **env_kwargs)
+        self.act_dim = probe.act_dim
+        self.sensors = probe.sensors
+        self.k_loss = probe.k_loss
+        self.max_steps = probe.max_steps
+        self.observation_space = probe.observation_space
+
+        self._shms = {}
+        for name, shape, dtype in _FIELDS:
+            nbytes = max(1, int(np.prod((self.num_envs,) + shape)) * np.dtype(dtype).itemsize)
+            self._shms[name] = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._arrays = _views(self._shms, self.num_envs, 0, self.num_envs)
+        shm_names = {name: shm.name for name, shm in self._shms.items()}
+
+        # 每个 worker 一个由根种子派生的独立子种子（seed + rank 会让相邻种子的运行共享随机流）
+        worker_seeds = spawn_seeds(seed, self.num_workers)
+
+        ctx = mp.get_context(context)
+        self._conns = []
+        self._procs = []
+        for rank in range(self.num_workers):
+            lo = rank * self.envs_per_worker
+            hi = lo + self.envs_per_worker
+            kwargs = dict(env_kwargs, seed=worker_seeds[rank])
+            parent_conn, child_conn = ctx.Pipe()
+            proc = ctx.Process(target=_worker, args=(child_conn, shm_names, self.num_envs, lo, hi, kwargs),
+                               daemon=True)
+            proc.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._procs.append(proc)
+        self.closed = False
+
+    def _broadcast(self, cmd):
+        for conn in self._conns:
+            conn.send_bytes(cmd)
+        for conn in self._conns:
+            conn.recv_bytes()
+
+    def reset(self):
+        self._broadcast(_CMD_RESET)
+        return self._arrays["obs"].copy()
+
+    def step_async(self, actions):
+        self._arrays["actions"][:] = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+        for conn in self._conns:
+            conn.send_bytes(_CMD_STEP)
+
+    def step_wait(self):
+        for conn in self._conns:
+            conn.recv_bytes()
+        arrays = self._arrays
+        info = {
+            "detect": arrays["detect"].copy(),
+            "dist": arrays["dist"].copy(),
+            "lost_steps": arrays["lost_steps"].copy(),
+            "final_obs": arrays["final_obs"].copy(),
+        }
+        return arrays["obs"].copy(), arrays["reward"].copy(), arrays["done"].copy(), info
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for conn in self._conns:
+            try:
+                conn.send_bytes(_CMD_CLOSE)
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        for conn in self._conns:
+            conn.close()
+        self._arrays = None
+        for shm in self._shms.values():
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def make_vector_env(num_envs, num_workers=0, seed=42, **env_kwargs):
+    """num_workers=0 时返回进程内的 VectorEnv，否则返回 num_workers 个子进程的 SubprocVectorEnv
+    （每个子进程 num_envs // num_workers 个环境，num_envs 必须能被 num_workers 整除）"""
+    if num_workers <= 0:
+        return VectorEnv(num_envs, seed=seed, **env_kwargs)
+    per, remainder = divmod(int(num_envs), int(num_workers))
+    if per == 0 or remainder:
+        raise ValueError("num_envs ({}) must be a positive multiple of num_workers ({})".format(num_envs, num_workers))
+    return SubprocVectorEnv(num_workers, per, seed=seed, **env_kwargs)
@@ -0,0 +1,119 @@
+import numpy as np
+from parl.utils import ReplayMemory
+
+from seeding import make_rng
+
+
+class SumTree:
+    """数组实现的求和树（同时维护最小值树），叶子数补齐为 2 的幂。
+
+    tree[1] 为根，节点 i 的子节点为 2i、2i+1，叶子 j 位于 capacity + j。
+    更新与按前缀和查找都是 O(log N)，并且都支持一次处理一批下标，批内没有 Python 循环。
+    """
+
+    def __init__(self, capacity):
+        self.capacity = 1 << max(int(capacity) - 1, 0).bit_length()
+        self.sum_tree = np.zeros(2 * self.capacity)
+        self.min_tree = np.full(2 * self.capacity, np.inf)
+
+    @property
+    def total(self):
+        return float(self.sum_tree[1])
+
+    @property
+    def min(self):
+        return float(self.min_tree[1])
+
+    def update(self, idx, priorities):
+        """批量设置叶子 idx 的优先级，并逐层向上重算父节点"""
+        node = np.asarray(idx, dtype=np.int64).reshape(-1) + self.capacity
+        self.sum_tree[node] = priorities
+        self.min_tree[node] = priorities
+        node = np.unique(node // 2)
+        while node[0] >= 1:
+            left, right = 2 * node, 2 * node + 1
+            self.sum_tree[node] = self.sum_tree[left] + self.sum_tree[right]
+            self.min_tree[node] = np.minimum(self.min_tree[left], self.min_tree[right])
+            if node[0] == 1:
+                break
+            node = np.unique(node // 2)
+
+    def find(self, values):
+        """批量查找：返回前缀和首次超过 values 的叶子下标"""
+        values = np.asarray(values, dtype=np.float64).copy()
+        node = np.ones(len(values), dtype=np.int64)
+        while node[0] < self.capacity:      # 所有查询同时下降一层
+            left = 2 * node
+            left_sum = self.sum_tree[left]
+            go_right = values > left_sum
+            values -= np.where(go_right, left_sum, 0.0)
+            node = left + go_right
+        return node - self.capacity
+
+
+class PrioritizedReplayMemory(ReplayMemory):
+    """按 TD 误差优先级采样的经验回放（Schaul et al. 的比例变体），存储沿用 parl 的 ReplayMemory。
+
+    append/sample_batch 与 ReplayMemory 相同，可直接替换；sample_prioritized 额外返回
+    重要性采样权重与下标，训练后用 update_priorities(idx, td_errors) 批量更新优先级。
+    新经验以当前最大优先级写入，保证至少被采样一次。
+    """
+
+    def __init__(self, max_size, obs_dim, act_dim, alpha=0.6, beta=0.4, beta_increment=1e-5, eps=1e-6,
+                 seed=None):
+        super(PrioritizedReplayMemory, self).__init__(max_size, obs_dim, act_dim)
+        self.alpha = float(alpha)                   # 优先级指数：0 为均匀采样
+        self.beta = float(beta)                     # 重要性采样修正指数，随训练线性增大到 1
+        self.beta_increment = float(beta_increment)
+        self.eps = float(eps)
+        self.tree = SumTree(self.max_size)
+        self.max_priority = 1.0
+        self.rng = make_rng(seed)
+
+    def append(self, obs, act, reward, next_obs, terminal):
+        pos = self._curr_pos
+        super(PrioritizedReplayMemory, self).append(obs, act, reward, next_obs, terminal)
+        self.tree.update(pos, self.max_priority ** self.alpha)
+
+    def sample_prioritized(self, batch_size):
+        """分层采样一批经验：返回 (obs, action, reward, next_obs, terminal), weights, idx"""
+        segment = self.tree.total / batch_size
+        values = np.minimum((np.arange(batch_size) + self.rng.random(batch_size)) * segment,
+                            self.tree.total * (1 - 1e-12))     # 避免舍入误差落到空叶子
+        idx = np.minimum(self.tree.find(values), self._curr_size - 1)
+
+        # 重要性采样权重 (N * P(i))^-beta，按最大可能权重归一化到 (0, 1]
+        prob = self.tree.sum_tree[idx + self.tree.capacity] / self.tree.total
+        min_prob = self.tree.min / self.tree.total
+        weights = (prob / min_prob) ** (-self.beta)
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        return self.sample_batch_by_index(idx), weights.astype(np.float32), idx
+
+    def sample_batch(self, batch_size):
+        return self.sample_prioritized(batch_size)[0]
+
+    def update_priorities(self, idx, td_errors):
+        """用 agent.learn 返回的 TD 误差批量更新优先级"""
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64).reshape(-1)) + self.eps
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(idx, priorities ** self.alpha)
+
+
+def bulk_append(memory, obs, act, reward, next_obs, terminal):
+    """ReplayMemory / PrioritizedReplayMemory 的批量 append：一次切片赋值写入 n 条经验，
+    结果与按顺序逐条 append 相同（超过容量时只保留最后 max_size 条）；返回写入的下标"""
+    obs, act, reward = np.asarray(obs), np.asarray(act), np.asarray(reward)
+    next_obs, terminal = np.asarray(next_obs), np.asarray(terminal)
+    n = len(obs)
+    skip = max(0, n - memory.max_size)
+    idx = (memory._curr_pos + np.arange(skip, n)) % memory.max_size
+    memory.obs[idx] = obs[skip:]
+    memory.action[idx] = act[skip:]
+    memory.reward[idx] = reward[skip:]
+    memory.next_obs[idx] = next_obs[skip:]
+    memory.terminal[idx] = terminal[skip:]
+    memory._curr_pos = (memory._curr_pos + n) % memory.max_size
+    memory._curr_size = min(memory._curr_size + n, memory.max_size)
+    if isinstance(memory, PrioritizedReplayMemory):
+        memory.tree.update(idx, memory.max_priority ** memory.alpha)
+    return idx
@@ -0,0 +1,155 @@
+"""
+训练循环的分阶段计时与 cProfile：
+- PhaseTimer：time.perf_counter_ns 计时 + 计数器，按阶段启用。热路径上的用法是
+      t = timer.clock(); ...; t = timer.lap("env_step", t); ...; t = timer.lap("append", t)
+  lap 把 [t, now) 记到该阶段并返回 now，相邻阶段共用一次取时钟；未启用的阶段只取时钟不累加，
+  完全不启用时 clock/lap 为空函数。
+  episode_totals() 取出并清零当前 episode 的累计值（写入训练指标；批量环境中同一步结束的 k 个 episode
+  先调用 split(k)，之后 k 次 episode_totals() 各得到其中的 1/k），window_summary() 给出最近若干 episode
+  （每 100 集）每个阶段的总耗时、调用次数与平均每次耗时；
+- EpisodeProfiler：只在 [start, stop] 这一段 episode 内运行 cProfile，结束后写出 pstats 文件并打印热点。
+
+阶段：env_step、sample（agent.sample：张量转换 + 前向）、append、sample_batch、learn（agent.learn 整体），
+以及 learn 内部的 sync_target、to_tensor、backward（前向 + 反向 + 优化器更新）。
+"""
+
+import io
+import time
+import pstats
+import cProfile
+
+PHASES = ("env_step", "sample", "append", "sample_batch", "learn")
+LEARN_PHASES = ("sync_target", "to_tensor", "backward")
+ALL_PHASES = PHASES + LEARN_PHASES
+
+
+def parse_phases(spec):
+    """命令行的阶段列表：'' 为不计时，'all' 为全部，否则为逗号分隔的阶段名"""
+    if not spec:
+        return ()
+    if spec == "all":
+        return ALL_PHASES
+    phases = tuple(p.strip() for p in spec.split(",") if p.strip())
+    unknown = set(phases) - set(ALL_PHASES)
+    if unknown:
+        raise ValueError("unknown timing phases %s, expected a subset of %s" % (sorted(unknown), ALL_PHASES))
+    return phases
+
+
+def _noop_clock():
+    return 0
+
+
+def _noop_lap(phase, start):
+    return 0
+
+
+class PhaseTimer:
+    """按阶段累计耗时（纳秒）与次数"""
+
+    def __init__(self, phases=()):
+        self.phases = tuple(p for p in ALL_PHASES if p in set(phases))
+        self._enabled = frozenset(self.phases)
+        self._ns = dict.fromkeys(self.phases, 0)
+        self._calls = dict.fromkeys(self.phases, 0)
+        self._window_ns = dict.fromkeys(self.phases, 0)
+        self._window_calls = dict.fromkeys(self.phases, 0)
+        self._window_start = time.perf_counter_ns()
+        self._shares = 0            # split() 之后还剩几次 episode_totals() 返回均分值
+        self._share = {}
+        if not self.phases:         # 不计时：热路径上只剩一次空函数调用
+            self.clock = _noop_clock
+            self.lap = _noop_lap
+
+    def __bool__(self):
+        return bool(self.phases)
+
+    def clock(self):
+        return time.perf_counter_ns()
+
+    def lap(self, phase, start):
+        now = time.perf_counter_ns()
+        if phase in self._enabled:
+            self._ns[phase] += now - start
+            self._calls[phase] += 1
+        return now
+
+    def split(self, count):
+        """把当前累计值均分给之后的 count 次 episode_totals()（同一步结束的多个 episode）"""
+        if count > 1 and self.phases:
+            self._shares = 0
+            self._share = {k: v / count for k, v in self.episode_totals().items()}
+            self._shares = count
+
+    def episode_totals(self):
+        """当前 episode 各阶段的耗时（毫秒），取出后清零并累加到统计窗口"""
+        if self._shares:
+            self._shares -= 1
+            return dict(self._share)
+        totals = {}
+        for p in self.phases:
+            totals[p + "_ms"] = self._ns[p] / 1e6
+            self._window_ns[p] += self._ns[p]
+            self._window_calls[p] += self._calls[p]
+            self._ns[p] = 0
+            self._calls[p] = 0
+        return totals
+
+    def window_summary(self):
+        """自上次调用以来各阶段的总耗时（毫秒）、调用次数、平均每次耗时（微秒）与占墙钟时间的比例，取出后清零"""
+        now = time.perf_counter_ns()
+        wall = max(now - self._window_start, 1)
+        summary = {"wall_ms": wall / 1e6}
+        for p in self.phases:
+            ns, calls = self._window_ns[p], self._window_calls[p]
+            summary[p + "_ms"] = ns / 1e6
+            summary[p + "_calls"] = calls
+            summary[p + "_us_per_call"] = ns / calls / 1e3 if calls else 0.0
+            summary[p + "_share"] = ns / wall
+            self._window_ns[p] = 0
+            self._window_calls[p] = 0
+        self._window_start = now
+        return summary
+
+    def format_summary(self, summary):
+        return ", ".join("{} {:.1%} ({:.1f} us x {})".format(p, summary[p + "_share"], summary[p + "_us_per_call"],
+                                                             summary[p + "_calls"]) for p in self.phases)
+
+
+NULL_TIMER = PhaseTimer()
+
+
+class EpisodeProfiler:
+    """在 episode [start, stop]（含两端）期间运行 cProfile，结束时写出 pstats 并打印前 top 个热点"""
+
+    def __init__(self, window, path, top=25):
+        start, _, stop = window.partition(":")
+        self.start = int(start)
+        self.stop = int(stop) if stop else self.start
+        if self.stop < self.start:
+            raise ValueError("profile window %r ends before it starts" % (window,))
+        self.path = path
+        self.top = int(top)
+        self._profile = None
+
+    def begin(self, episode):
+        if episode == self.start:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def end(self, episode):
+        """窗口结束时返回热点报告（文本），否则返回 None"""
+        if self._profile is not None and episode >= self.stop:
+            return self.finish()
+        return None
+
+    def finish(self):
+        """结束剖析并输出结果（训练在窗口结束前停止时也会调用）"""
+        if self._profile is None:
+            return None
+        self._profile.disable()
+        self._profile.dump_stats(self.path)
+        out = io.StringIO()
+        pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(self.top)
+        self._profile = None
+        return out.getvalue()
@@ -0,0 +1,155 @@
+"""
+训练后量化：把 numpy_policy.py 导出的 float32 权重压缩为 int8（按输出通道缩放）或 float16，
+并在固定的一组 Env 种子上与 float32 模型对比，输出评估报告：
+- 贪心动作一致率：沿 float32 策略的轨迹逐步比较两个模型的 argmax
+- 探测率 / 平均每步奖励：两个模型各自驱动相同种子的 episode
+- 文件大小与单次决策延迟：量化只是存储格式，Policy 加载时按通道一次还原为 float32，
+  运行时的参数内存与延迟和 float32 模型相同（逐次在前向中反量化的 int8 路径比 float32 更慢，已不提供）
+
+使用示例：
+  python quantize.py --npz policy.npz --mode int8 --out policy_int8.npz
+  python quantize.py --ckpt model.ckpt --mode float16 --episodes 200 --report quant_report.json
+"""
+
+import os
+import json
+import time
+import argparse
+import numpy as np
+
+from Envir import Env
+from numpy_policy import LAYERS, Policy, export_npz
+from seeding import episode_seed
+
+
+def quantize_arrays(arrays, mode="int8"):
+    """量化 fc*.weight；偏置保持 float32（只占很小一部分且对精度敏感）。
+
+    int8：每个输出通道（W 的每一列）一个缩放因子 scale = max|W[:, j]| / 127，
+    W_q = round(W / scale)，推理时 W ≈ W_q * scale。
+    """
+    if mode not in ("int8", "float16"):
+        raise ValueError("mode must be 'int8' or 'float16', got %r" % (mode,))
+    out = {}
+    for name in LAYERS:
+        w = np.asarray(arrays[name + ".weight"], dtype=np.float32)
+        out[name + ".bias"] = np.asarray(arrays[name + ".bias"], dtype=np.float32)
+        if mode == "float16":
+            out[name + ".weight"] = w.astype(np.float16)
+            continue
+        scale = np.abs(w).max(axis=0) / 127.0
+        scale[scale == 0] = 1.0       # 全零通道
+        out[name + ".weight"] = np.clip(np.rint(w / scale), -127, 127).astype(np.int8)
+        out[name + ".weight_scale"] = scale.astype(np.float32)
+    return out
+
+
+def quantize_npz(src_path, out_path, mode="int8"):
+    with np.load(src_path) as data:
+        arrays = {k: data[k] for k in data.files}
+    np.savez(out_path, **quantize_arrays(arrays, mode))
+    return out_path
+
+
+def compare_policies(reference, candidate, seed=0, episodes=100, max_steps=None):
+    """在固定种子集合上比较两个策略：第 ep 个 episode 用 episode_seed(seed, ep) 重置，两个模型看到相同的起点与速度"""
+    env = Env(seed=seed)
+    if max_steps is not None:
+        env.max_steps = int(max_steps)
+
+    def rollout(policy, ep, other=None):
+        obs = env.reset(seed=episode_seed(seed, ep))
+        steps = detects = agree = 0
+        total_reward = 0.0
+        done = False
+        while not done:
+            action = policy.act(obs)
+            if other is not None:
+                agree += int(other.act(obs) == action)
+            obs, reward, done, info = env.step(action)
+            steps += 1
+            detects += int(info["detect"])
+            total_reward += reward
+        return steps, detects, agree, total_reward
+
+    stats = {"reference": np.zeros(4), "candidate": np.zeros(4)}
+    for ep in range(episodes):
+        stats["reference"] += rollout(reference, ep, other=candidate)
+        stats["candidate"] += rollout(candidate, ep)
+    ref, cand = stats["reference"], stats["candidate"]
+    return {
+        "episodes": episodes,
+        "action_agreement": ref[2] / ref[0],
+        "detect_rate_reference": ref[1] / ref[0],
+        "detect_rate_candidate": cand[1] / cand[0],
+        "avg_step_reward_reference": ref[3] / ref[0],
+        "avg_step_reward_candidate": cand[3] / cand[0],
+    }
+
+
+def act_latency_us(policy, iters=2000, seed=0):
+    """单个观测 act() 的平均延迟（微秒）"""
+    obs = np.random.default_rng(seed).uniform(0, 100, size=(iters, policy.obs_dim)).astype(np.float32)
+    for o in obs[:100]:
+        policy.act(o)
+    t0 = time.perf_counter()
+    for o in obs:
+        policy.act(o)
+    return (time.perf_counter() - t0) / iters * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Post-training int8/float16 quantization of the NumPy policy')
+    parser.add_argument('--npz', type=str, default='policy.npz', help='float32 weights exported by numpy_policy.py')
+    parser.add_argument('--ckpt', type=str, default=None, help='export --npz from this model.ckpt first (needs paddle)')
+    parser.add_argument('--mode', type=str, default='int8', choices=['int8', 'float16'])
+    parser.add_argument('--out', type=str, default=None, help='quantized .npz (default: policy_<mode>.npz)')
+    parser.add_argument('--episodes', type=int, default=100, help='evaluation episodes on the fixed seed set')
+    parser.add_argument('--seed', type=int, default=0, help='root seed of the evaluation episodes')
+    parser.add_argument('--report', type=str, default=None, help='optional JSON report path')
+    args = parser.parse_args()
+
+    if args.ckpt:
+        export_npz(args.ckpt, args.npz)
+    out_path = args.out or os.path.splitext(args.npz)[0] + "_" + args.mode + ".npz"
+    quantize_npz(args.npz, out_path, args.mode)
+
+    reference = Policy(args.npz)
+    candidate = Policy(out_path)
+    report = compare_policies(reference, candidate, seed=args.seed, episodes=args.episodes)
+    report.update({
+        "mode": args.mode,
+        "file_bytes_reference": os.path.getsize(args.npz),
+        "file_bytes_candidate": os.path.getsize(out_path),
+        "param_bytes_reference": reference.nbytes,
+        "param_bytes_candidate": candidate.nbytes,
+        "act_us_reference": act_latency_us(reference),
+        "act_us_candidate": act_latency_us(candidate),
+        "runtime_dtype": "float32",     # 量化权重在加载时还原，运行时与 float32 模型相同
+    })
+
+    print("\n" + "="*60)
+    print(f"QUANTIZATION REPORT ({args.mode}, {args.episodes} episodes, seed {args.seed})")
+    print("="*60)
+    print(f"Greedy action agreement: {report['action_agreement']*100:.2f}%")
+    print(f"Detection rate:          float32 {report['detect_rate_reference']*100:.2f}%  "
+          f"{args.mode} {report['detect_rate_candidate']*100:.2f}%")
+    print(f"Avg step reward:         float32 {report['avg_step_reward_reference']:.3f}  "
+          f"{args.mode} {report['avg_step_reward_candidate']:.3f}")
+    print(f"File size:               float32 {report['file_bytes_reference']/1024:.1f} KB  "
+          f"{args.mode} {report['file_bytes_candidate']/1024:.1f} KB")
+    print(f"Runtime parameters:      float32 {report['param_bytes_reference']/1024:.1f} KB  "
+          f"{args.mode} {report['param_bytes_candidate']/1024:.1f} KB (dequantized to float32 at load)")
+    print(f"act() latency:           float32 {report['act_us_reference']:.1f} us  "
+          f"{args.mode} {report['act_us_candidate']:.1f} us")
+    print("="*60)
+    print(f"[OK] Quantized weights saved to {out_path}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"[OK] Report saved to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+离线绘图（报告）：
+- 所有图都从已保存的数据渲染：训练指标文件（metrics.MetricsWriter 的输出）、评估奖励（.npy）、
+  仿真记录（simulate_and_visualize 保存的 npz）；
+- 渲染时强制使用非交互的 Agg 后端，不弹窗、不阻塞；
+- 训练、评估、仿真脚本先保存模型与数据，再用 dispatch() 在后台进程中渲染（默认），
+  也可以 --report none 跳过，之后单独运行本脚本。
+
+使用示例：
+  python report.py train --metrics train_metrics.jsonl --out_dir .
+  python report.py eval --rewards eval_rewards.npy --out eval_rewards.png
+  python report.py sim --data simulation/results/simulation_data.npz --save_dir simulation/results
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+import numpy as np
+
+from metrics import load_metrics, block_means
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORT_SCRIPT = os.path.join(PROJECT_DIR, "report.py")
+MODES = ("background", "inline", "none")
+
+
+def _pyplot(interactive=False):
+    """导入 pyplot；interactive=False 时强制 Agg 后端（在导入 pyplot 之前设置）"""
+    import matplotlib
+    if not interactive:
+        matplotlib.use("Agg", force=True)
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def render_training(metrics_path, out_dir="."):
+    """训练指标图（奖励曲线与每100集的探测率/丢失概率/切换率）与传感器动作散点图"""
+    plt = _pyplot()
+    columns = load_metrics(metrics_path)
+    episodes = columns.get('episode', np.empty(0))
+    rewards = columns.get('reward', np.empty(0))
+    episode_actions = columns.get('action', np.empty(0))
+    detect_rates_100 = block_means(columns.get('detect_rate', np.empty(0)))
+    lost_probs_100 = block_means(columns.get('lost_prob', np.empty(0)))
+    switch_rates_100 = block_means(columns.get('switch_rate', np.empty(0)))
+    episodes_100 = 100 * np.arange(1, len(detect_rates_100) + 1)
+
+    # 绘制原始奖励曲线
+    plt.figure(figsize=(15, 12))
+
+    # 第一个子图：奖励曲线
+    plt.subplot(2, 2, 1)
+    plt.plot(episodes, rewards, linestyle='-', color='b', linewidth=1)
+    plt.xlabel('Episode')
+    plt.ylabel('Reward')
+    plt.title('Training Reward per Episode')
+    plt.grid(True, alpha=0.3)
+
+    # 第二个子图：每100集的探测成功率
+    plt.subplot(2, 2, 2)
+    plt.plot(episodes_100, detect_rates_100, marker='o', linestyle='-', color='g', linewidth=2)
+    plt.xlabel('Episode (per 100)')
+    plt.ylabel('Detection Rate')
+    plt.title('1 Detection Rate (every 100 episodes)')
+    plt.ylim([0, 1.05])
+    plt.grid(True, alpha=0.3)
+    for ep, rate in zip(episodes_100, detect_rates_100):
+        plt.text(ep, rate + 0.02, f'{rate:.3f}', ha='center', fontsize=9)
+
+    # 第三个子图：每100集的连续丢失概率
+    plt.subplot(2, 2, 3)
+    plt.plot(episodes_100, lost_probs_100, marker='s', linestyle='-', color='r', linewidth=2)
+    plt.xlabel('Episode (per 100)')
+    plt.ylabel('Lost Probability')
+    plt.title('2 Continuous Loss Probability (every 100 episodes)')
+    plt.ylim([0, 1.05])
+    plt.grid(True, alpha=0.3)
+    for ep, prob in zip(episodes_100, lost_probs_100):
+        plt.text(ep, prob + 0.02, f'{prob:.3f}', ha='center', fontsize=9)
+
+    # 第四个子图：每100集的切换率
+    plt.subplot(2, 2, 4)
+    plt.plot(episodes_100, switch_rates_100, marker='^', linestyle='-', color='orange', linewidth=2)
+    plt.xlabel('Episode (per 100)')
+    plt.ylabel('Switch Rate')
+    plt.title('3 Switch Rate (every 100 episodes)')
+    plt.ylim([0, max(switch_rates_100) * 1.2 if len(switch_rates_100) else 0.5])
+    plt.grid(True, alpha=0.3)
+    for ep, rate in zip(episodes_100, switch_rates_100):
+        plt.text(ep, rate + max(switch_rates_100) * 0.02, f'{rate:.3f}', ha='center', fontsize=9)
+
+    plt.tight_layout()
+    metrics_png = os.path.join(out_dir, 'training_metrics.png')
+    plt.savefig(metrics_png, dpi=150, bbox_inches='tight')
+    plt.close()
+    print(f"✅ 训练指标图已保存为: {metrics_png}")
+
+    # 原始的传感器动作散点图
+    plt.figure(figsize=(12, 4))
+    plt.scatter(episodes, episode_actions, marker='.', color='r', alpha=0.5)
+    plt.xlabel('Episode')
+    plt.ylabel('Sensor ID')
+    plt.title('Sensor Actions Over Episodes')
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    actions_png = os.path.join(out_dir, 'sensor_actions.png')
+    plt.savefig(actions_png, dpi=150, bbox_inches='tight')
+    plt.close()
+    print(f"✅ 传感器动作图已保存为: {actions_png}")
+
+
+def render_evaluation(rewards_path, out_png="eval_rewards.png"):
+    """评估时每个 episode 的平均单步奖励"""
+    plt = _pyplot()
+    rewards = np.load(rewards_path)
+    episodes = np.arange(1, len(rewards) + 1)
+    plt.figure(figsize=(8, 4))
+    plt.plot(episodes, rewards, '-o', linewidth=1)
+    plt.xlabel('Episode')
+    plt.ylabel('Average Step Reward')
+    plt.title('Evaluation Average Step Reward per Episode')
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(out_png)
+    plt.close()
+    print(f"Saved reward plot to {out_png}")
+
+
+def render_simulation(data_path, save_dir, show=False):
+    """仿真轨迹图、统计图与多 episode 奖励对比；show=True 时使用交互后端并显示"""
+    _pyplot(interactive=show)
+    from simulation.simulate_and_visualize import render_results
+    render_results(data_path, save_dir, show=show)
+
+
+def dispatch(mode, argv):
+    """按 mode 渲染报告：background 在独立进程中渲染（立即返回），inline 在当前进程中渲染，
+    none 只打印之后可以运行的命令。argv 为本脚本的命令行参数，例如 ['train', '--metrics', path]"""
+    if mode not in MODES:
+        raise ValueError("report mode must be one of %s, got %r" % (MODES, mode))
+    command = [sys.executable, REPORT_SCRIPT] + list(argv)
+    if mode == "background":
+        print("rendering plots in the background (pid {})".format(subprocess.Popen(command).pid))
+    elif mode == "inline":
+        main(argv)
+    else:
+        print("plots skipped; render them with: " + subprocess.list2cmdline(command))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render plots from saved training/evaluation/simulation data')
+    commands = parser.add_subparsers(dest='command', required=True)
+    train = commands.add_parser('train', help='training metrics and sensor actions')
+    train.add_argument('--metrics', type=str, default='./train_metrics.jsonl', help='metrics file written by train(2).py')
+    train.add_argument('--out_dir', type=str, default='.', help='directory for the png files')
+    evaluation = commands.add_parser('eval', help='evaluation reward curve')
+    evaluation.add_argument('--rewards', type=str, default='eval_rewards.npy', help='rewards saved by evaluate.py')
+    evaluation.add_argument('--out', type=str, default='eval_rewards.png', help='output png path')
+    sim = commands.add_parser('sim', help='simulation trajectories and statistics')
+    sim.add_argument('--data', type=str, required=True, help='npz saved by simulate_and_visualize.py')
+    sim.add_argument('--save_dir', type=str, required=True, help='directory for the png files')
+    sim.add_argument('--show', action='store_true', help='display the figures interactively')
+    args = parser.parse_args(argv)
+
+    if args.command == 'train':
+        render_training(args.metrics, args.out_dir)
+    elif args.command == 'eval':
+        render_evaluation(args.rewards, args.out)
+    else:
+        render_simulation(args.data, args.save_dir, show=args.show)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+import numpy as np
+
+
+def make_rng(seed=None):
+    """由 seed 得到一个独立的 numpy.random.Generator，不修改任何全局随机状态。
+
+    seed 可以是 None（系统熵）、int、np.random.SeedSequence 或已有的 Generator（原样返回）。
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+
+def spawn_seeds(seed, n):
+    """从根种子派生 n 个互不相关的子 SeedSequence，分给各个 worker / 环境 / agent。
+
+    同一个根种子总是派生出同样的子种子，因此并行 rollout 既相互独立又可复现。
+    """
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return root.spawn(int(n))
+
+
+def episode_seed(seed, episode):
+    """第 episode 个 episode 的种子：只取决于 (seed, episode)，与运行顺序和进程划分无关，
+    配合 env.reset(seed=...) 可以单独复现任意一个 episode。"""
+    return np.random.SeedSequence(entropy=seed, spawn_key=(int(episode),))
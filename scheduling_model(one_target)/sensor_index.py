@@ -0,0 +1,132 @@
+import numpy as np
+
+
+class SensorGridIndex:
+    """传感器覆盖圆的均匀网格索引，每个布局只构建一次。
+
+    每个网格单元记录与之相交的覆盖圆，查询时只需对点所在单元的少量候选传感器做精确判断，
+    因此"哪些传感器覆盖点 p"与"最近的覆盖传感器"在传感器数量很大时也接近常数时间。
+    所有查询都支持批量点 (P, 2)，候选表是填充为 -1 的 (C, K) 数组，批量查询无 Python 循环。
+    """
+
+    max_cells = 1 << 20  # 网格单元数上限，限制内存占用
+
+    def __init__(self, positions, ranges, cell_size=None):
+        self.positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        self.ranges = np.asarray(ranges, dtype=np.float64).reshape(-1)
+        self.ranges_sq = self.ranges * self.ranges
+        num_sensors = len(self.ranges)
+
+        self.origin = (self.positions - self.ranges[:, None]).min(axis=0)
+        extent = (self.positions + self.ranges[:, None]).max(axis=0) - self.origin
+        if cell_size is None:
+            # 以覆盖半径中位数为单元边长：每个圆大约落在 3x3 个单元中
+            cell_size = float(np.median(self.ranges))
+        cell_size = max(float(cell_size), float(np.sqrt(extent.prod() / self.max_cells)), 1e-9)
+        self.cell_size = cell_size
+        self.shape = np.maximum(np.ceil(extent / cell_size).astype(np.int64), 1)
+
+        # 精确的圆-矩形相交测试，得到 (单元, 传感器) 对
+        cells, sensors = [], []
+        for s in range(num_sensors):
+            lo = np.floor((self.positions[s] - self.ranges[s] - self.origin) / cell_size).astype(np.int64)
+            hi = np.floor((self.positions[s] + self.ranges[s] - self.origin) / cell_size).astype(np.int64)
+            lo = np.clip(lo, 0, self.shape - 1)
+            hi = np.clip(hi, 0, self.shape - 1)
+            gx, gy = np.meshgrid(np.arange(lo[0], hi[0] + 1), np.arange(lo[1], hi[1] + 1), indexing="ij")
+            gx, gy = gx.ravel(), gy.ravel()
+            x0 = self.origin[0] + gx * cell_size
+            y0 = self.origin[1] + gy * cell_size
+            dx = np.clip(self.positions[s, 0], x0, x0 + cell_size) - self.positions[s, 0]
+            dy = np.clip(self.positions[s, 1], y0, y0 + cell_size) - self.positions[s, 1]
+            hit = dx * dx + dy * dy <= self.ranges_sq[s]
+            cells.append(gx[hit] * self.shape[1] + gy[hit])
+            sensors.append(np.full(int(hit.sum()), s, dtype=np.int64))
+        cells = np.concatenate(cells) if cells else np.empty(0, dtype=np.int64)
+        sensors = np.concatenate(sensors) if sensors else np.empty(0, dtype=np.int64)
+
+        # 候选表：(C, K)，每行是该单元的传感器下标，不足 K 个用 -1 填充
+        num_cells = int(self.shape.prod())
+        order = np.lexsort((sensors, cells))
+        cells, sensors = cells[order], sensors[order]
+        counts = np.bincount(cells, minlength=num_cells)
+        width = max(int(counts.max()) if counts.size else 0, 1)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        slot = np.arange(len(cells)) - starts[cells]
+        self.cell_sensors = np.full((num_cells, width), -1, dtype=np.int64)
+        self.cell_sensors[cells, slot] = sensors
+        self.cell_counts = counts
+
+    def _cell_ids(self, points):
+        """点所在的单元编号；落在网格之外的点返回 -1（不会被任何传感器覆盖）。
+        网格上边界上的点（例如恰好在传感器圆周上）归入最后一个单元，与 SensorTable 的结果一致"""
+        offset = points - self.origin
+        inside = ((offset >= 0) & (offset <= self.shape * self.cell_size)).all(axis=-1)
+        g = np.floor(offset / self.cell_size).astype(np.int64)
+        g = np.clip(g, 0, self.shape - 1)
+        return np.where(inside, g[..., 0] * self.shape[1] + g[..., 1], -1)
+
+    def candidates(self, points):
+        """批量候选传感器：返回 (P, K)，-1 表示空位"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        cell = self._cell_ids(points)
+        cand = self.cell_sensors[np.maximum(cell, 0)]
+        cand[cell < 0] = -1
+        return cand
+
+    def _candidate_dist_sq(self, points):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        cand = self.candidates(points)
+        safe = np.maximum(cand, 0)
+        dx = points[:, 0, None] - self.positions[safe, 0]
+        dy = points[:, 1, None] - self.positions[safe, 1]
+        dist_sq = dx * dx + dy * dy
+        covered = (cand >= 0) & (dist_sq <= self.ranges_sq[safe])
+        return cand, dist_sq, covered
+
+    def covering_batch(self, points):
+        """批量查询覆盖每个点的传感器：返回 (P, K) 传感器下标，未覆盖的位置为 -1"""
+        cand, _, covered = self._candidate_dist_sq(points)
+        return np.where(covered, cand, -1)
+
+    def covering(self, point):
+        """覆盖单个点的传感器下标（升序）"""
+        ids = self.covering_batch(point)[0]
+        return ids[ids >= 0]
+
+    def coverage_mask(self, points):
+        """批量覆盖掩码 (P, S)，与 SensorTable.coverage 结果相同"""
+        cand, _, covered = self._candidate_dist_sq(points)
+        mask = np.zeros((len(cand), len(self.ranges)), dtype=bool)
+        rows, cols = np.nonzero(covered)
+        mask[rows, cand[rows, cols]] = True
+        return mask
+
+    def nearest_covering(self, points):
+        """批量查询最近的覆盖传感器：返回 (P,) 传感器下标，未被覆盖的点为 -1"""
+        cand, dist_sq, covered = self._candidate_dist_sq(points)
+        dist_sq = np.where(covered, dist_sq, np.inf)
+        best = dist_sq.argmin(axis=1)
+        rows = np.arange(len(cand))
+        return np.where(covered[rows, best], cand[rows, best], -1)
+
+
+class NearestSensorPolicy:
+    """启发式策略：若上一次的传感器仍覆盖目标当前位置则保持（避免切换惩罚），
+    否则切换到覆盖该位置的最近传感器；都不覆盖时沿用上一次的传感器。
+    接口与 agent.predict 相同，可直接替换。"""
+
+    def __init__(self, index):
+        self.index = index
+
+    def predict_batch(self, obs):
+        obs = np.asarray(obs, dtype=np.float64).reshape(-1, 6)
+        pos = obs[:, 0:2]
+        last = obs[:, 4].astype(np.int64)
+        d = pos - self.index.positions[last]
+        keep = (d * d).sum(axis=1) <= self.index.ranges_sq[last]
+        nearest = self.index.nearest_covering(pos)
+        return np.where(keep | (nearest < 0), last, nearest)
+
+    def predict(self, obs):
+        return int(self.predict_batch(obs)[0])
@@ -21,9 +21,7 @@ os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from Envir import Env
-from cartpole_model import CartpoleModel
-from cartpole_agent import CartpoleAgent
-from parl.algorithms import DQN
+from numpy_policy import Policy
 
 
 def get_model_path(model_name="model.ckpt"):
@@ -44,21 +42,29 @@ def quick_simulate(model_path="model.ckpt", max_steps=200, seed=None):
     obs_dim = 6  # 固定：[x, y, x_prev, y_prev, last_action, lost_flag]
     act_dim = env.act_dim  # 从环境自动读取传感器数量
     
-    model = CartpoleModel(obs_dim=obs_dim, act_dim=act_dim)
-    alg = DQN(model, gamma=0.95, lr=0.001)
-    agent = CartpoleAgent(alg, act_dim=env.act_dim, e_greed=0.0, e_greed_decrement=0.0)
-    
-    # 尝试加载模型
-    if os.path.exists(model_path) or os.path.exists(model_path + ".pdparams"):
-        try:
-            agent.load_model(model_path)
-            print(f"[OK] Model loaded from {model_path}")
-        except Exception as e:
-            print(f"[WARNING] Model load failed: {e}")
-            print("[INFO] Using random agent")
+    if model_path.endswith(".npz"):
+        # numpy_policy.py 导出的权重：纯 NumPy 推理，不导入 paddle/parl
+        agent = Policy(model_path)
+        print(f"[OK] NumPy policy loaded from {model_path}")
     else:
-        print(f"[WARNING] Model not found at {model_path}")
-        print("[INFO] Using random agent")
+        from cartpole_model import CartpoleModel
+        from cartpole_agent import CartpoleAgent
+        from parl.algorithms import DQN
+        model = CartpoleModel(obs_dim=obs_dim, act_dim=act_dim)
+        alg = DQN(model, gamma=0.95, lr=0.001)
+        agent = CartpoleAgent(alg, act_dim=env.act_dim, e_greed=0.0, e_greed_decrement=0.0)
+
+        # 尝试加载模型
+        if os.path.exists(model_path) or os.path.exists(model_path + ".pdparams"):
+            try:
+                agent.load_model(model_path)
+                print(f"[OK] Model loaded from {model_path}")
+            except Exception as e:
+                print(f"[WARNING] Model load failed: {e}")
+                print("[INFO] Using random agent")
+        else:
+            print(f"[WARNING] Model not found at {model_path}")
+            print("[INFO] Using random agent")
     
     # 运行仿真并收集数据
     print("Running simulation...")
@@ -120,7 +126,14 @@ def quick_simulate(model_path="model.ckpt", max_steps=200, seed=None):
             import random as rand_module
             colors.append(f'#{rand_module.randint(0, 0xFFFFFF):06x}')
     
-    for i, sensor in enumerate(env.sensors):
+    # 传感器很多时只画与本条轨迹相关的传感器（空间索引批量查询）
+    if len(env.sensors) > len(color_palette):
+        shown = set(env.sensor_table.sensors_covering_any(positions).tolist()) | set(actions.tolist())
+    else:
+        shown = range(len(env.sensors))
+    
+    for i in sorted(shown):
+        sensor = env.sensors[i]
         pos = sensor['position']
         rng = sensor['range']
         
@@ -201,7 +214,7 @@ def quick_simulate(model_path="model.ckpt", max_steps=200, seed=None):
 if __name__ == '__main__':
     import argparse
     parser = argparse.ArgumentParser(description='Quick simulation and visualization')
-    parser.add_argument('--model', type=str, default='model.ckpt', help='Model filename')
+    parser.add_argument('--model', type=str, default='model.ckpt', help='Model filename (.npz runs without paddle)')
     parser.add_argument('--max-steps', type=int, default=200, help='Max steps')
     parser.add_argument('--seed', type=int, default=None, help='Random seed')
     args = parser.parse_args()
@@ -7,6 +7,9 @@
 - 模型选择的活跃传感器
 - 传感器观测的(角度, 距离)数据
 
+仿真数据保存为 <save-dir>/simulation_data.npz，图由 report.py 从该文件渲染（默认在后台进程中，
+Agg 后端）；--show 时在当前进程中用交互后端渲染并显示。
+
 使用示例：
   python simulate_and_visualize.py
   python simulate_and_visualize.py --episodes 5 --max-steps 300 --show
@@ -15,18 +18,14 @@
 import os
 import sys
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-from matplotlib.patches import Circle
 import argparse
 
 # 添加父目录到路径以导入模块
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from Envir import Env
-from cartpole_model import CartpoleModel
-from cartpole_agent import CartpoleAgent
-from parl.algorithms import DQN
+from numpy_policy import Policy
+from report import MODES as REPORT_MODES, dispatch as dispatch_report, render_simulation
 
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 
@@ -80,7 +79,17 @@ def load_agent(obs_dim, act_dim, model_path=None):
     # 转换为绝对路径
     if not os.path.isabs(model_path):
         model_path = get_model_path(model_path)
-    
+
+    # .npz（numpy_policy.py 导出）：纯 NumPy 推理，不导入 paddle/parl
+    if model_path.endswith(".npz"):
+        policy = Policy(model_path)
+        print(f"[OK] NumPy policy loaded from {model_path}")
+        return policy
+
+    from cartpole_model import CartpoleModel
+    from cartpole_agent import CartpoleAgent
+    from parl.algorithms import DQN
+
     model = CartpoleModel(obs_dim=obs_dim, act_dim=act_dim)
     alg = DQN(model, gamma=0.95, lr=0.001)
     agent = CartpoleAgent(alg, act_dim=act_dim, e_greed=0.0, e_greed_decrement=0.0)
@@ -140,8 +149,39 @@ def run_simulation(agent, env, max_steps=200, verbose=True):
     return recorder, total_reward
 
 
+def save_recordings(path, recorders, rewards):
+    """把多个 episode 的记录保存到一个 npz 文件（各字段按 episode 首尾相接，offsets 为分段位置）"""
+    lengths = [len(r.times) for r in recorders]
+    np.savez(path,
+             offsets=np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+             positions=np.concatenate([np.reshape(r.positions, (-1, 2)) for r in recorders]),
+             actions=np.concatenate([np.asarray(r.actions, dtype=np.int64) for r in recorders]),
+             rewards=np.concatenate([np.asarray(r.rewards, dtype=np.float64) for r in recorders]),
+             detects=np.concatenate([np.asarray(r.detects, dtype=bool) for r in recorders]),
+             distances=np.concatenate([np.asarray(r.distances, dtype=np.float64) for r in recorders]),
+             times=np.concatenate([np.asarray(r.times, dtype=np.int64) for r in recorders]),
+             total_rewards=np.asarray(rewards, dtype=np.float64))
+
+
+def load_recordings(path, env):
+    """save_recordings 的逆操作：返回 (recorders, total_rewards)"""
+    data = np.load(path)
+    offsets = data["offsets"]
+    recorders = []
+    for lo, hi in zip(offsets[:-1], offsets[1:]):
+        recorder = SimulationRecorder(env=env)
+        for i in range(lo, hi):
+            recorder.record(data["positions"][i], int(data["actions"][i]), float(data["rewards"][i]),
+                            bool(data["detects"][i]), float(data["distances"][i]), int(data["times"][i]))
+        recorders.append(recorder)
+    return recorders, data["total_rewards"].tolist()
+
+
 def plot_trajectory(recorder, env, save_path=None):
     """绘制目标轨迹和传感器"""
+    import matplotlib.pyplot as plt
+    from matplotlib.patches import Circle
+
     fig, ax = plt.subplots(figsize=(12, 10))
     
     # 提取数据
@@ -170,7 +210,14 @@ def plot_trajectory(recorder, env, save_path=None):
             import random as rand_module
             colors.append(f'#{rand_module.randint(0, 0xFFFFFF):06x}')
     
-    for i, sensor in enumerate(env.sensors):
+    # 传感器很多时只画与本条轨迹相关的传感器（覆盖过轨迹点或被选中过），用空间索引批量查询
+    if len(env.sensors) > len(color_palette):
+        shown = set(env.sensor_table.sensors_covering_any(positions).tolist()) | set(int(a) for a in recorder.actions)
+    else:
+        shown = range(len(env.sensors))
+    
+    for i in sorted(shown):
+        sensor = env.sensors[i]
         sensor_pos = sensor['position']
         sensor_range = sensor['range']
         
@@ -208,6 +255,8 @@ def plot_trajectory(recorder, env, save_path=None):
 
 def plot_statistics(recorder, env=None, save_path=None):
     """绘制统计信息"""
+    import matplotlib.pyplot as plt
+
     fig, axes = plt.subplots(2, 2, figsize=(14, 10))
     
     times = np.array(recorder.times)
@@ -306,6 +355,14 @@ def print_summary(recorder, env=None):
     print(f"Total reward: {total_reward:.2f}")
     print(f"Average reward per step: {total_reward/total_steps:.2f}")
     print(f"Detection rate: {detect_rate:.1f}%")
+    
+    # 可覆盖步数：目标位置至少被一个传感器覆盖（空间索引批量查询）
+    if env is not None and total_steps > 0:
+        coverable = env.sensor_table.nearest_covering(np.array(recorder.positions)) >= 0
+        print(f"Coverable steps: {np.mean(coverable)*100:.1f}%")
+        if coverable.any():
+            print(f"Detection rate on coverable steps: {np.mean(detects[coverable])*100:.1f}%")
+    
     print(f"\nSensor usage ({num_sensors} sensors total):")
     
     # 传感器使用统计
@@ -331,14 +388,68 @@ def print_summary(recorder, env=None):
     print("="*60 + "\n")
 
 
+def plot_comparison(all_rewards, save_path):
+    """多 episode 的总奖励对比柱状图"""
+    import matplotlib.pyplot as plt
+
+    episodes = len(all_rewards)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    episodes_range = np.arange(1, episodes + 1)
+    colors = plt.cm.viridis(np.linspace(0, 1, episodes))
+    for i, reward in enumerate(all_rewards):
+        ax.bar(i + 1, reward, color=colors[i], alpha=0.7, label=f'Episode {i+1}')
+    ax.set_xlabel('Episode', fontsize=12)
+    ax.set_ylabel('Total Reward', fontsize=12)
+    ax.set_title('Reward Comparison Across Episodes', fontsize=14, fontweight='bold')
+    ax.set_xticks(episodes_range)
+    ax.grid(True, alpha=0.3, axis='y')
+    ax.legend()
+    plt.tight_layout()
+    plt.savefig(save_path, dpi=150, bbox_inches='tight')
+    print(f"[OK] Comparison plot saved to {save_path}")
+    return fig
+
+
+def render_results(data_path, save_dir, show=False):
+    """从 save_recordings 保存的数据渲染所有图；show=False 时每张图保存后立即关闭"""
+    import matplotlib.pyplot as plt
+
+    env = Env(seed=0)       # 只用到传感器布局
+    all_recorders, all_rewards = load_recordings(data_path, env)
+    for ep, recorder in enumerate(all_recorders):
+        print(f"Plotting episode {ep+1}...")
+
+        # 轨迹图
+        traj_path = os.path.join(save_dir, f'episode_{ep+1:02d}_trajectory.png')
+        fig_traj = plot_trajectory(recorder, env, save_path=traj_path)
+
+        # 统计图
+        stat_path = os.path.join(save_dir, f'episode_{ep+1:02d}_statistics.png')
+        fig_stat = plot_statistics(recorder, env=env, save_path=stat_path)
+        if not show:
+            plt.close(fig_traj)
+            plt.close(fig_stat)
+
+    # 绘制多episode对比
+    if len(all_rewards) > 1:
+        fig = plot_comparison(all_rewards, os.path.join(save_dir, 'episodes_comparison.png'))
+        if not show:
+            plt.close(fig)
+
+    if show:
+        plt.show()
+
+
 def main():
     parser = argparse.ArgumentParser(description='Run simulation and visualization')
-    parser.add_argument('--model', type=str, default='model.ckpt', help='Model filename (relative to project root)')
+    parser.add_argument('--model', type=str, default='model.ckpt', help='Model filename (relative to project root); a .npz runs without paddle')
     parser.add_argument('--episodes', type=int, default=10, help='Number of episodes to simulate')
     parser.add_argument('--max-steps', type=int, default=200, help='Max steps per episode')
     parser.add_argument('--seed', type=int, default=None, help='Random seed')
     parser.add_argument('--save-dir', type=str, default='./results', help='Directory to save results')
     parser.add_argument('--show', action='store_true', help='Show plots interactively')
+    parser.add_argument('--report', type=str, default='background', choices=REPORT_MODES,
+                        help='render the plots in a background process, inline, or not at all (see report.py)')
     args = parser.parse_args()
     
     # 创建输出目录
@@ -370,43 +481,12 @@ def main():
         all_rewards.append(total_reward)
         print()
     
-    # 绘制结果
-    for ep, recorder in enumerate(all_recorders):
-        print(f"Plotting episode {ep+1}...")
-        
-        # 轨迹图
-        traj_path = os.path.join(args.save_dir, f'episode_{ep+1:02d}_trajectory.png')
-        fig_traj = plot_trajectory(recorder, env, save_path=traj_path)
-        plt.close(fig_traj)
-        
-        # 统计图
-        stat_path = os.path.join(args.save_dir, f'episode_{ep+1:02d}_statistics.png')
-        fig_stat = plot_statistics(recorder, env=env, save_path=stat_path)
-        plt.close(fig_stat)
-        
-        # 摘要
+    # 先保存仿真数据，绘图由 report.py 完成（默认在后台进程中，不阻塞）
+    data_path = os.path.join(args.save_dir, 'simulation_data.npz')
+    save_recordings(data_path, all_recorders, all_rewards)
+    for recorder in all_recorders:
         print_summary(recorder, env=env)
-    
-    # 绘制多episode对比
-    if args.episodes > 1:
-        fig, ax = plt.subplots(figsize=(10, 6))
-        episodes_range = np.arange(1, args.episodes + 1)
-        colors = plt.cm.viridis(np.linspace(0, 1, args.episodes))
-        for i, reward in enumerate(all_rewards):
-            ax.bar(i + 1, reward, color=colors[i], alpha=0.7, label=f'Episode {i+1}')
-        ax.set_xlabel('Episode', fontsize=12)
-        ax.set_ylabel('Total Reward', fontsize=12)
-        ax.set_title('Reward Comparison Across Episodes', fontsize=14, fontweight='bold')
-        ax.set_xticks(episodes_range)
-        ax.grid(True, alpha=0.3, axis='y')
-        ax.legend()
-        plt.tight_layout()
-        
-        compare_path = os.path.join(args.save_dir, 'episodes_comparison.png')
-        plt.savefig(compare_path, dpi=150, bbox_inches='tight')
-        print(f"[OK] Comparison plot saved to {compare_path}")
-        plt.close(fig)
-    
+
     # 总体统计
     print("\n" + "="*60)
     print("OVERALL STATISTICS")
@@ -418,9 +498,10 @@ def main():
     print("="*60 + "\n")
     
     if args.show:
-        plt.show()
+        render_simulation(data_path, args.save_dir, show=True)
     else:
-        print(f"[INFO] Plots saved to {os.path.abspath(args.save_dir)}")
+        dispatch_report(args.report, ['sim', '--data', data_path, '--save_dir', args.save_dir])
+        print(f"[INFO] Plots are written to {os.path.abspath(args.save_dir)}")
         print("[INFO] Use --show flag to display plots interactively")
 
 
@@ -0,0 +1,281 @@
+"""
+超参数搜索：
+- 搜索空间由 JSON 文件给出（网格或随机）。参数名就是 train(2).py 的命令行参数（learn_freq、batch_size、
+  learning_rate、gamma、memory_warmup_size、update_target_steps ...），reward.<名称> 覆盖 Envir.DEFAULT_REWARDS；
+- 每个试验是一个独立的 train(2).py 子进程，在自己的目录中运行（模型、日志、指标互不干扰）；
+  同时运行的试验数默认等于可用的 CPU 核数，每个试验绑定到一个空闲的核，并把 OMP/MKL 线程数限制为 1；
+- 早停（median stopping rule）：训练指标是流式写入的，每隔 poll 秒增量读取；episode 数超过 grace 后，
+  若最近 window 集的平均指标差于其他试验在相同 episode 区间上的中位数，就终止该试验；
+- 所有试验的参数、状态与最后 window 集的平均指标写入同一个结果表（CSV），按指标排序。
+
+spec 示例（method 为 grid 时 params 的取值必须都是列表，试验为它们的笛卡尔积）：
+  {
+    "method": "random",
+    "num_trials": 16,
+    "fixed": {"max_episode": 3000, "num_envs": 8},
+    "params": {
+      "learning_rate": {"low": 1e-4, "high": 3e-3, "log": true},
+      "gamma": [0.9, 0.95, 0.99],
+      "update_target_steps": {"low": 100, "high": 400, "int": true},
+      "reward.switch": {"low": -4.0, "high": -0.5}
+    }
+  }
+
+使用示例：
+  python sweep.py --spec sweep.json --out ./sweep --grace 500 --window 100
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import itertools
+import subprocess
+from collections import deque
+import numpy as np
+
+from seeding import make_rng
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+TRAIN_SCRIPT = os.path.join(PROJECT_DIR, "train(2).py")
+
+METRICS = ("reward", "detect_rate", "lost_prob", "switch_rate")
+LOWER_IS_BETTER = ("lost_prob", "switch_rate")
+# 每个试验只用一个计算线程（paddle 的 CPU 算子与 numpy 都走 OpenMP/MKL/OpenBLAS）
+THREAD_ENV = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+# 试验的默认参数：不写检查点、不绘图，减少日志输出
+TRIAL_DEFAULTS = {"checkpoint_every": 0, "report": "none", "log_every": 100}
+
+
+def _sample_param(rng, choice):
+    """列表：均匀选取一项；{"low", "high", "log", "int"}：（对数）均匀分布"""
+    if isinstance(choice, list):
+        return choice[int(rng.integers(len(choice)))]
+    low, high = float(choice["low"]), float(choice["high"])
+    if choice.get("log"):
+        value = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+    else:
+        value = float(rng.uniform(low, high))
+    return int(round(value)) if choice.get("int") else value
+
+
+def expand_spec(spec, seed=0):
+    """把 spec 展开为每个试验的参数字典列表"""
+    params = spec.get("params", {})
+    method = spec.get("method", "grid")
+    if method == "grid":
+        for name, values in params.items():
+            if not isinstance(values, list):
+                raise ValueError("grid search needs a list of values for %r, got %r" % (name, values))
+        names = list(params)
+        return [dict(zip(names, values)) for values in itertools.product(*(params[n] for n in names))]
+    if method == "random":
+        rng = make_rng(seed)
+        return [{name: _sample_param(rng, choice) for name, choice in params.items()}
+                for _ in range(int(spec.get("num_trials", 10)))]
+    raise ValueError("spec method must be 'grid' or 'random', got %r" % (method,))
+
+
+def trial_command(params, metrics_path):
+    """试验参数 -> train(2).py 的命令行；reward.* 合并为 --rewards JSON，True 为开关参数"""
+    argv = [sys.executable, TRAIN_SCRIPT, "--metrics", metrics_path]
+    rewards = {}
+    for name, value in params.items():
+        if name.startswith("reward."):
+            rewards[name[len("reward."):]] = value
+        elif value is True:
+            argv.append("--" + name)
+        elif value is not False and value is not None:
+            argv += ["--" + name, str(value)]
+    if rewards:
+        argv += ["--rewards", json.dumps(rewards)]
+    return argv
+
+
+class Trial:
+    """一个试验子进程及其增量读取的训练指标"""
+
+    def __init__(self, index, params, directory):
+        self.index = index
+        self.params = params
+        self.directory = os.path.abspath(directory)     # 试验在自己的目录中运行
+        self.metrics_path = os.path.join(self.directory, "metrics.jsonl")
+        self.values = {m: [] for m in METRICS}
+        self.status = "pending"
+        self.proc = None
+        self.core = None
+        self.seconds = 0.0
+        self._offset = 0
+        self._log = None
+        self._start = None
+
+    @property
+    def episodes(self):
+        return len(self.values[METRICS[0]])
+
+    def start(self, core, env):
+        os.makedirs(self.directory, exist_ok=True)
+        self._log = open(os.path.join(self.directory, "train.log"), "w")
+        # 在 exec 之前绑核：子进程（以及 paddle/OpenMP 之后创建的线程）从一开始就只在这个核上运行
+        pin = None if core is None else (lambda: os.sched_setaffinity(0, {core}))
+        self.proc = subprocess.Popen(trial_command(self.params, self.metrics_path), cwd=self.directory, env=env,
+                                     stdout=self._log, stderr=subprocess.STDOUT, preexec_fn=pin)
+        self.core = core
+        self.status = "running"
+        self._start = time.time()
+
+    def poll_metrics(self):
+        """读取指标文件中新写入的完整行（最后一行可能还没写完，留到下次）"""
+        if not os.path.exists(self.metrics_path):
+            return
+        with open(self.metrics_path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if line.strip():
+                record = json.loads(line)
+                for m in METRICS:
+                    self.values[m].append(float(record[m]))
+        self._offset += end
+
+    def window_mean(self, metric, lo, hi):
+        values = self.values[metric]
+        return float(np.mean(values[lo:hi])) if len(values) >= hi else None
+
+    def finish(self, status):
+        if status == "stopped" and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        self.poll_metrics()
+        self._log.close()
+        self.seconds = time.time() - self._start
+        self.status = status
+
+    def summary(self, window):
+        row = {"trial": self.index, "status": self.status, "episodes": self.episodes,
+               "seconds": round(self.seconds, 1)}
+        row.update(self.params)
+        for m in METRICS:
+            values = self.values[m][-window:]
+            row[m] = float(np.mean(values)) if values else float("nan")
+        return row
+
+
+def should_stop(trial, trials, metric, grace, window, min_peers):
+    """median stopping rule：最近 window 集的均值差于其他试验同一区间均值的中位数"""
+    n = trial.episodes
+    if n < max(grace, window) or n >= int(trial.params.get("max_episode", n + 1)):
+        return False        # 训练已结束、正在保存模型的试验不终止
+    lo = n - window
+    own = trial.window_mean(metric, lo, n)
+    peers = [t.window_mean(metric, lo, n) for t in trials if t is not trial and t.episodes >= n]
+    peers = [p for p in peers if p is not None]
+    if len(peers) < min_peers:
+        return False
+    median = float(np.median(peers))
+    return own > median if metric in LOWER_IS_BETTER else own < median
+
+
+def write_results(path, trials, metric, window):
+    rows = [t.summary(window) for t in trials if t.status not in ("pending", "running")]
+    sign = 1.0 if metric in LOWER_IS_BETTER else -1.0
+    rows.sort(key=lambda r: (r["status"] == "failed", np.nan_to_num(sign * r[metric], nan=np.inf)))
+    fields = []
+    for row in rows:
+        fields += [k for k in row if k not in fields]
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp, path)
+    return rows
+
+
+def run_sweep(args):
+    with open(args.spec) as f:
+        spec = json.load(f)
+    fixed = dict(TRIAL_DEFAULTS, seed=args.seed)
+    fixed.update(spec.get("fixed", {}))
+    os.makedirs(args.out, exist_ok=True)
+    trials = [Trial(i, dict(fixed, **params), os.path.join(args.out, "trial_%03d" % i))
+              for i, params in enumerate(expand_spec(spec, seed=args.seed))]
+    with open(os.path.join(args.out, "trials.json"), "w") as f:
+        json.dump([t.params for t in trials], f, indent=2)
+    if args.dry_run:
+        for t in trials:
+            print(subprocess.list2cmdline(trial_command(t.params, t.metrics_path)))
+        return []
+
+    # 进程池大小与可用的核一致；不支持 sched_setaffinity 的平台上不绑核
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = [None] * (os.cpu_count() or 1)
+    jobs = min(args.jobs or len(cores), len(cores))
+    free = deque(cores[:jobs])
+
+    env = dict(os.environ, MPLBACKEND="Agg", **{name: "1" for name in THREAD_ENV})
+    results_path = os.path.join(args.out, "results.csv")
+    pending = deque(trials)
+    running = []
+    print("sweep: {} trials, {} at a time".format(len(trials), jobs))
+    try:
+        while pending or running:
+            while pending and free:
+                trial = pending.popleft()
+                trial.start(free.popleft(), env)
+                running.append(trial)
+            time.sleep(args.poll)
+            for trial in list(running):
+                trial.poll_metrics()
+                code = trial.proc.poll()
+                if code is not None:
+                    trial.finish("done" if code == 0 else "failed")
+                elif should_stop(trial, trials, args.metric, args.grace, args.window, args.min_peers):
+                    trial.finish("stopped")
+                else:
+                    continue
+                running.remove(trial)
+                free.append(trial.core)
+                write_results(results_path, trials, args.metric, args.window)
+                print("trial {:3d} {:7s} after {:5d} episodes ({:.0f}s), {} {:.4f}".format(
+                    trial.index, trial.status, trial.episodes, trial.seconds, args.metric,
+                    trial.summary(args.window)[args.metric]))
+    finally:
+        for trial in running:
+            trial.finish("stopped")
+
+    rows = write_results(results_path, trials, args.metric, args.window)
+    names = [k for k in rows[0] if k not in ("trial", "status", "episodes", "seconds") + METRICS] if rows else []
+    print("\nresults ({}, sorted by {}):".format(results_path, args.metric))
+    for row in rows:
+        print("  #{:<3d} {:7s} {:5d} ep  {}={:.4f}  {}".format(
+            row["trial"], row["status"], row["episodes"], args.metric, row[args.metric],
+            " ".join("{}={}".format(k, row[k]) for k in names if k in row)))
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parallel hyperparameter sweep over train(2).py')
+    parser.add_argument('--spec', type=str, required=True, help='JSON search spec (grid or random)')
+    parser.add_argument('--out', type=str, default='./sweep', help='directory for trial runs and results.csv')
+    parser.add_argument('--jobs', type=int, default=0, help='concurrent trials (0 = one per available core)')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='seed for random search and the training seed shared by all trials')
+    parser.add_argument('--metric', type=str, default='reward', choices=METRICS,
+                        help='metric used for early stopping and ranking')
+    parser.add_argument('--window', type=int, default=100, help='episodes averaged for comparisons and results')
+    parser.add_argument('--grace', type=int, default=500, help='episodes before a trial may be stopped early')
+    parser.add_argument('--min_peers', type=int, default=2,
+                        help='trials needed at the same episode count before early stopping applies')
+    parser.add_argument('--poll', type=float, default=5.0, help='seconds between progress checks')
+    parser.add_argument('--dry_run', action='store_true', help='print the trial commands and exit')
+    run_sweep(parser.parse_args())
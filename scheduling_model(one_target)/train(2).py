@@ -8,12 +8,26 @@ from parl.env import CompatWrapper, is_gym_version_ge
 from parl.algorithms import DQN
 
 import os
+import copy
+import json
+import time
 os.environ["KMP_DUPLICATE_LIB_OK"]="TRUE"
 
-import matplotlib.pyplot as plt
 import numpy as np
+import paddle
 
 from Envir import Env
+from parallel_env import make_vector_env
+from prioritized_replay import PrioritizedReplayMemory, bulk_append
+from compact_replay import CompactReplayMemory
+from convergence import ConvergenceMonitor
+from profiling import PhaseTimer, EpisodeProfiler, parse_phases
+from metrics import MetricsWriter, RollingStats
+from report import MODES as REPORT_MODES, dispatch as dispatch_report
+from checkpoint import (AsyncCheckpointer, load_checkpoint, snapshot_agent, restore_agent, snapshot_env,
+                        restore_env, snapshot_replay, restore_replay)
+from seeding import spawn_seeds
+from warmup import POLICIES, collect_transitions, insert_transitions
 
 LEARN_FREQ = 10  # training frequency   # 训练频率
 MEMORY_SIZE = 200000            # replay memory的大小
@@ -21,6 +35,27 @@ MEMORY_WARMUP_SIZE = 1000         # 减少预热大小以加快初始训练
 BATCH_SIZE = 128             # 增加批大小以稳定梯度
 LEARNING_RATE = 0.001       # 提高学习率以加快收敛
 GAMMA = 0.95                # 适度降低gamma以平衡长期和短期奖励
+UPDATE_TARGET_STEPS = 200   # 目标网络同步间隔（学习次数）
+# 以上常数都可以用同名的小写命令行参数覆盖（sweep.py 超参数搜索时使用），奖励常数用 --rewards 覆盖
+
+# 一次学习更新：优先经验回放时使用重要性权重，并用返回的 TD 误差更新优先级
+def learn_step(agent, rpm):
+    timer = agent.timer     # 分阶段计时（--time_phases），默认为空操作
+    t = timer.clock()
+    if isinstance(rpm, PrioritizedReplayMemory):
+        batch, weights, idx = rpm.sample_prioritized(BATCH_SIZE)
+        t = timer.lap('sample_batch', t)
+        train_loss, td = agent.learn(*batch, weights=weights)
+        timer.lap('learn', t)
+        rpm.update_priorities(idx, td)
+        return train_loss
+    (batch_obs, batch_action, batch_reward, batch_next_obs,      # 从经验回放缓冲区中抽样一批数据
+     batch_done) = rpm.sample_batch(BATCH_SIZE)
+    t = timer.lap('sample_batch', t)
+    train_loss = agent.learn(batch_obs, batch_action, batch_reward,     # 使用抽样数据来训练智能体的模型
+                             batch_next_obs, batch_done)
+    timer.lap('learn', t)
+    return train_loss
 
 # train an episode
 def run_train_episode(agent, env, rpm): #agent智能体，用于执行动作和学习策略;env智能体与之互动的模拟环境，它提供了状态、奖励等信息;rpm：Replay Memory，经验回放缓冲区，用于存储智能体的经验，以便后续训练
@@ -36,12 +71,16 @@ def run_train_episode(agent, env, rpm): #agent智能体，用于执行动作和
     lost_episode = 0  # 该episode是否发生了连续丢失 (lost_steps >= k_loss)
     switch_count = 0  # 传感器切换次数
     last_action = None  # 上一个动作
+    loss_sum, loss_count = 0.0, 0  # 本episode内训练损失
+    timer = agent.timer
     
     while True:         # 进入无限循环，直到一个训练周期结束
         step += 1       # 计算步数
         total_steps += 1  # 累计总步数
         
+        t = timer.clock()
         action = agent.sample(obs)      #代理根据当前状态obs从策略中选择一个动作
+        timer.lap('sample', t)
         
         # 检测切换
         if last_action is not None and action != last_action:
@@ -49,7 +88,9 @@ def run_train_episode(agent, env, rpm): #agent智能体，用于执行动作和
         last_action = action
         
         # 调用环境 step（环境内部会更新真实位置并返回 obs）
+        t = timer.clock()
         next_obs, reward, done, info = env.step(action)        #代理执行动作，与环境互动，获取下一个状态 next_obs、奖励 reward、是否完成 done 等信息
+        timer.lap('env_step', t)
         # print("时刻: "+str(step) + " 调度传感器编号: "+str(action))
         
         # 统计探测成功（通过info字典判断）
@@ -60,14 +101,15 @@ def run_train_episode(agent, env, rpm): #agent智能体，用于执行动作和
         if info.get('lost_steps', 0) >= env.k_loss:
             lost_episode = 1
         
+        t = timer.clock()
         rpm.append(obs, action, reward, next_obs, done)     #将这一步的经验存储到经验回放缓冲区中
+        timer.lap('append', t)
         # train model       检查经验回放缓冲区中是否有足够的经验用于训练，并且每隔一定的步数执行一次模型的学习（训练操作
         if (len(rpm) > MEMORY_WARMUP_SIZE) and (step % LEARN_FREQ == 0):
             # s,a,r,s',done
-            (batch_obs, batch_action, batch_reward, batch_next_obs,      # 从经验回放缓冲区中抽样一批数据
-             batch_done) = rpm.sample_batch(BATCH_SIZE)
-            train_loss = agent.learn(batch_obs, batch_action, batch_reward,     # 使用抽样数据来训练智能体的模型
-                                     batch_next_obs, batch_done)
+            train_loss = learn_step(agent, rpm)
+            loss_sum += train_loss
+            loss_count += 1
 
         total_reward += reward      # 累积当前步的奖励到总奖励
         obs = next_obs      # 更新当前观察状态
@@ -78,12 +120,92 @@ def run_train_episode(agent, env, rpm): #agent智能体，用于执行动作和
     detect_rate = total_detect / total_steps if total_steps > 0 else 0  # 探测成功率
     lost_prob = lost_episode  # 是否发生连续丢失 (0 or 1)
     switch_rate = switch_count / total_steps if total_steps > 0 else 0  # 切换率
+    mean_loss = loss_sum / loss_count if loss_count else float('nan')   # 平均训练损失（未训练时为 nan）
     
-    return total_reward, action, detect_rate, lost_prob, switch_rate     # 返回奖励、动作、探测率、丢失概率、切换率
+    return total_reward, action, detect_rate, lost_prob, switch_rate, mean_loss     # 返回奖励、动作、探测率、丢失概率、切换率、平均损失
+
+
+# 批量环境版本的 run_train_episode：生成器，每结束一个 episode 产出一次与 run_train_episode 相同的返回值
+def vector_train_episodes(agent, venv, rpm):    # venv: VectorEnv 或 SubprocVectorEnv（make_vector_env 创建）
+    n = venv.num_envs
+    obs = venv.reset()
+
+    # 每个槽位各自的统计量
+    total_reward = np.zeros(n)
+    total_detect = np.zeros(n, dtype=np.int64)
+    total_steps = np.zeros(n, dtype=np.int64)
+    lost_episode = np.zeros(n, dtype=np.int64)
+    switch_count = np.zeros(n, dtype=np.int64)
+    last_action = np.full(n, -1, dtype=np.int64)
+    learn_credit = 0    # 每积累 LEARN_FREQ 条经验训练一次，保持与单环境相同的经验/更新比例
+    loss_sum = np.zeros(n)                      # 各槽位当前 episode 期间所有训练步的损失之和
+    loss_count = np.zeros(n, dtype=np.int64)
+    timer = agent.timer
+
+    while True:
+        t = timer.clock()
+        action = agent.sample_batch(obs)     # 所有槽位一次前向计算
+        timer.lap('sample', t)
+
+        # 检测切换（每个 episode 的第一步不计）
+        switch_count += (last_action >= 0) & (action != last_action)
+        last_action = action
+
+        t = timer.clock()
+        next_obs, reward, done, info = venv.step(action)
+        timer.lap('env_step', t)
+        final_obs = info['final_obs']      # 结束槽位的真实 next_obs（next_obs 中已是 reset 后的观测）
+
+        total_steps += 1
+        total_detect += info['detect']
+        lost_episode |= info['lost_steps'] >= venv.k_loss
+        total_reward += reward
+
+        t = timer.clock()
+        if isinstance(rpm, CompactReplayMemory):
+            rpm.append_batch(obs, action, reward, final_obs, done)     # 每个槽位写入各自的流
+        else:
+            bulk_append(rpm, obs, action, reward, final_obs, done)       # 一次切片赋值写入 n 条
+        timer.lap('append', t)
+
+        if len(rpm) > MEMORY_WARMUP_SIZE:
+            learn_credit += n
+            while learn_credit >= LEARN_FREQ:
+                learn_credit -= LEARN_FREQ
+                train_loss = learn_step(agent, rpm)
+                loss_sum += train_loss          # 每次训练计入所有正在进行的 episode
+                loss_count += 1
+
+        finished = np.flatnonzero(done)
+        if finished.size > 1:
+            timer.split(finished.size)      # 同一步结束的 episode 均分各阶段耗时
+        for i in finished:
+            mean_loss = loss_sum[i] / loss_count[i] if loss_count[i] else float('nan')
+            yield (float(total_reward[i]), int(action[i]), total_detect[i] / total_steps[i],
+                   int(lost_episode[i]), switch_count[i] / total_steps[i], mean_loss)
+            loss_sum[i] = 0.0
+            loss_count[i] = 0
+            total_reward[i] = 0.0
+            total_detect[i] = 0
+            total_steps[i] = 0
+            lost_episode[i] = 0
+            switch_count[i] = 0
+            last_action[i] = -1
+
+        obs = next_obs
 
 
 def main():
-    env = Env()
+    global LEARN_FREQ, MEMORY_WARMUP_SIZE, BATCH_SIZE, LEARNING_RATE, GAMMA, UPDATE_TARGET_STEPS
+    LEARN_FREQ, MEMORY_WARMUP_SIZE, BATCH_SIZE = args.learn_freq, args.memory_warmup_size, args.batch_size
+    LEARNING_RATE, GAMMA, UPDATE_TARGET_STEPS = args.learning_rate, args.gamma, args.update_target_steps
+    rewards = json.loads(args.rewards) if args.rewards else None
+
+    # 由 --seed 派生环境、向量环境与 agent 探索各自独立的随机数流，整个训练可复现
+    env_seed, venv_seed, agent_seed, rpm_seed, warmup_seed = spawn_seeds(args.seed, 5)
+    paddle.seed(args.seed)                      # 网络参数初始化
+    np.random.seed(args.seed)                   # parl 的 ReplayMemory.sample_batch 使用全局 np.random
+    env = Env(seed=env_seed, rewards=rewards)
     # Compatible for different versions of gym
     # env = CompatWrapper(env)                    # 确保与不同版本的gym兼容
 
@@ -91,139 +213,155 @@ def main():
     act_dim = env.act_dim  # 自动从环境获取动作维度（传感器数量）
     # logger.info('obs_dim {}, act_dim {}'.format(obs_dim, act_dim))  # 用日志记录器记录状态和动作空间的维度
 
+    # 多个环境批量推进（--num_envs > 1，--num_workers > 0 时为多进程共享内存）；紧凑回放按实际环境数分流
+    venv = None
+    if args.num_envs > 1:
+        venv = make_vector_env(args.num_envs, num_workers=args.num_workers, seed=venv_seed, rewards=rewards)
+    num_envs = venv.num_envs if venv is not None else 1
+
     # set action_shape = 0 while in discrete control environment    # 设置 action_shape = 0 在离散控制环境中
     rpm = ReplayMemory(MEMORY_SIZE, obs_dim, 0)                     # 创建经验回放内存 用于存储代理经验；obs_dim状态空间的维度；0 表示在离散动作环境中，不需要记录动作的维度
+    if args.prioritized:                                            # 按 TD 误差优先采样（求和树），接口与 ReplayMemory 相同
+        rpm = PrioritizedReplayMemory(MEMORY_SIZE, obs_dim, 0, seed=rpm_seed)
+    elif args.replay_dir:                                           # 紧凑的 memmap 经验回放：目录已存在时直接打开，用已有经验热启动
+        rpm = CompactReplayMemory(args.replay_dir, MEMORY_SIZE, act_dim, num_streams=num_envs, seed=rpm_seed)
+        if rpm.num_streams != num_envs:
+            raise ValueError(f"{args.replay_dir} was created with {rpm.num_streams} streams; "
+                             f"reopen it with --num_envs {rpm.num_streams}")
+        logger.info('replay memory {}: {} transitions'.format(args.replay_dir, len(rpm)))
 
     # build an agent
     model = CartpoleModel(obs_dim=obs_dim, act_dim=act_dim)     # 创建代理的模型 该模型可能是一个神经网络模型，用于逼近状态-动作值函数
     alg = DQN(model, gamma=GAMMA, lr=LEARNING_RATE)             # 创建DQN算法 使用DQN）算法创建代理的算法。gamma 是折扣因子，lr 是学习率
     agent = CartpoleAgent(                                      # 创建Cartpole代理，将算法、动作空间维度、初始贪婪度（e_greed）和贪婪度递减率（e_greed_decrement）传递给代理
-        alg, act_dim=act_dim, e_greed=1.0, e_greed_decrement=1e-4)
+        alg, act_dim=act_dim, e_greed=1.0, e_greed_decrement=1e-4, rng=agent_seed,
+        update_target_steps=UPDATE_TARGET_STEPS)
+
+    # 选择经验来源：单个 Env，或多个环境批量推进（venv 在创建回放之前构造）
+    if venv is not None:
+        episode_source = vector_train_episodes(agent, venv, rpm)
+        next_episode = lambda: next(episode_source)
+    else:
+        next_episode = lambda: run_train_episode(agent, env, rpm)
+
+    # 从检查点恢复：模型/目标网络/优化器、agent 状态、随机数流、经验回放与指标文件位置
+    ckpt = load_checkpoint(args.checkpoint_dir) if args.resume else None
+    if args.resume and ckpt is None:
+        logger.warning('no checkpoint found in {}, starting from scratch'.format(args.checkpoint_dir))
+    if ckpt is not None:
+        restore_agent(agent, ckpt['agent'])
+        lost = restore_replay(rpm, ckpt['replay'])
+        if lost:
+            logger.warning('{} replay transitions were overwritten after the checkpoint; '
+                           'the resumed run is not bit-identical'.format(lost))
+        if venv is None:
+            restore_env(env, ckpt['env'])
+        else:   # 批量环境在 episode 中途的状态不保存，各槽位从新的 episode 开始
+            logger.warning('vector environments restart their episodes on resume')
+        logger.info('resumed from episode {} ({} transitions in replay)'.format(ckpt['episode'], len(rpm)))
+    checkpointer = AsyncCheckpointer(args.checkpoint_dir) if args.checkpoint_every > 0 else None
 
     # warmup memory     # 填充经验回放内存
-    while len(rpm) < MEMORY_WARMUP_SIZE:        # 循环执行以下操作，直到经验回放内存的大小达到设定的 MEMORY_WARMUP_SIZE
-        temp = run_train_episode(agent, env, rpm)  # 返回值现在为5个元素，这里不需要处理
+    if args.warmup_policy == 'agent':
+        while len(rpm) < MEMORY_WARMUP_SIZE:        # 循环执行以下操作，直到经验回放内存的大小达到设定的 MEMORY_WARMUP_SIZE
+            temp = next_episode()  # 返回值现在为6个元素，这里不需要处理
+    elif len(rpm) < MEMORY_WARMUP_SIZE:
+        # 不经过网络：批量环境 + NumPy 随机/启发式动作，一次写入回放（紧凑回放每个环境对应一条流）
+        warmup_envs = rpm.num_streams if isinstance(rpm, CompactReplayMemory) else args.warmup_envs
+        start = time.perf_counter()
+        batch = collect_transitions(MEMORY_WARMUP_SIZE - len(rpm) + warmup_envs, warmup_envs, args.warmup_policy,
+                                    epsilon=args.warmup_epsilon, seed=warmup_seed, rewards=rewards)
+        insert_transitions(rpm, *batch)
+        logger.info('warmup ({}): {} transitions in {:.1f} ms'.format(
+            args.warmup_policy, len(rpm), (time.perf_counter() - start) * 1000))
 
     max_episode = args.max_episode          # 获取最大训练周期数
 
     # start training 开始训练代理
     episode = 0
-    episodes = []  # 存储episode数
-    rewards = []  # 存储reward值
-    
-    # 新增：用于收集每100集的指标
-    detect_rates_100 = []  # 每100集的平均探测率
-    lost_probs_100 = []    # 每100集的连续丢失概率 (发生连续丢失的集数占比)
-    switch_rates_100 = []  # 每100集的平均切换率
-    episodes_100 = []      # 标记点 (100, 200, 300, ...)
-    
-    # 用于临时存储100集的数据
-    temp_detect_rates = []
-    temp_lost_probs = []
-    temp_switch_rates = []
-    
-    # 初始化episode_steps和episode_actions列表
-    episode_steps = [0] * (max_episode + 1)
-    episode_actions = [0] * (max_episode + 1)
+    # 每个episode的指标流式写入文件（不在内存中保留历史），每100集的平均值由固定窗口的滑动统计给出
+    metrics = MetricsWriter(args.metrics, resume_offset=ckpt['metrics_offset'] if ckpt is not None else None)
+    rolling = RollingStats(('reward', 'detect_rate', 'lost_prob', 'switch_rate'), window=100)
+    # 收敛监控：保留窗口平均奖励最高的模型；--patience > 0 时指标进入平台期后提前停止
+    monitor = ConvergenceMonitor(args.patience, args.tolerance, args.min_episodes)
+    if ckpt is not None:
+        episode = ckpt['episode']
+        rolling = ckpt['rolling']
+        # 恢复历史最优与计数，停止条件以本次命令行为准
+        monitor = ckpt['monitor']
+        monitor.patience, monitor.tolerance, monitor.min_episodes = args.patience, args.tolerance, args.min_episodes
+    # 分阶段计时：每个 episode 的各阶段耗时写入训练指标，每100集的汇总写入 <metrics>.timing 文件
+    timer = PhaseTimer(parse_phases(args.time_phases))
+    agent.timer = timer
+    timing = None
+    if timer:
+        stem, ext = os.path.splitext(args.metrics)
+        # 与指标文件相同：恢复时截断到检查点时刻的长度，之后重跑的 episode 不会重复写入
+        timing = MetricsWriter(stem + '.timing' + ext,
+                               resume_offset=ckpt.get('timing_offset') if ckpt is not None else None)
+    profiler = EpisodeProfiler(args.profile, args.profile_out) if args.profile else None
+    episode_start = time.perf_counter()
 
-    while episode < max_episode:
+    converged = False
+    while episode < max_episode and not converged:
         episode += 1
-        total_reward, episode_actions[episode], detect_rate, lost_prob, switch_rate = run_train_episode(agent, env, rpm)
-        episode_steps[episode] = episode
-        print("episode: " + str(episode) + " reward: " + str(total_reward))
-        # 当前episode的reward记录
-        rewards.append(total_reward)
-        # 记录episode编号
-        episodes.append(episode)
-        
-        # 新增：收集当前episode的指标
-        temp_detect_rates.append(detect_rate)
-        temp_lost_probs.append(lost_prob)
-        temp_switch_rates.append(switch_rate)
+        if profiler is not None:
+            profiler.begin(episode)
+        total_reward, action, detect_rate, lost_prob, switch_rate, mean_loss = next_episode()
+        if profiler is not None:
+            report = profiler.end(episode)
+            if report:
+                print(report)
+        now = time.perf_counter()
+        record = {'episode': episode, 'reward': float(total_reward), 'action': int(action),
+                  'detect_rate': float(detect_rate), 'lost_prob': float(lost_prob),
+                  'switch_rate': float(switch_rate), 'loss': float(mean_loss),
+                  'epsilon': float(agent.e_greed), 'episode_time': now - episode_start}
+        record.update(timer.episode_totals())
+        episode_start = now
+        metrics.write(record)
+        rolling.update(record)
+        if episode % args.log_every == 0:
+            print("episode: " + str(episode) + " reward: " + str(total_reward))
         
         # 每100集计算和记录指标
         if episode % 100 == 0:
-            avg_detect_rate = np.mean(temp_detect_rates)
-            avg_lost_prob = np.mean(temp_lost_probs)  # 平均丢失概率
-            avg_switch_rate = np.mean(temp_switch_rates)
-            
-            detect_rates_100.append(avg_detect_rate)
-            lost_probs_100.append(avg_lost_prob)
-            switch_rates_100.append(avg_switch_rate)
-            episodes_100.append(episode)
-            
-            print(f"[Episode {episode}] 探测率: {avg_detect_rate:.4f}, 丢失概率: {avg_lost_prob:.4f}, 切换率: {avg_switch_rate:.4f}")
-            
-            # 清空临时列表
-            temp_detect_rates = []
-            temp_lost_probs = []
-            temp_switch_rates = []
-
-    print('episode:')
-    print(episodes)
-    print('Reward:')
-    print(rewards)
-    
-    # 绘制原始奖励曲线
-    plt.figure(figsize=(15, 12))
-    
-    # 第一个子图：奖励曲线
-    plt.subplot(2, 2, 1)
-    plt.plot(episodes, rewards, linestyle='-', color='b', linewidth=1)
-    plt.xlabel('Episode')
-    plt.ylabel('Reward')
-    plt.title('Training Reward per Episode')
-    plt.grid(True, alpha=0.3)
-    
-    # 第二个子图：每100集的探测成功率
-    plt.subplot(2, 2, 2)
-    plt.plot(episodes_100, detect_rates_100, marker='o', linestyle='-', color='g', linewidth=2)
-    plt.xlabel('Episode (per 100)')
-    plt.ylabel('Detection Rate')
-    plt.title('1 Detection Rate (every 100 episodes)')
-    plt.ylim([0, 1.05])
-    plt.grid(True, alpha=0.3)
-    for i, (ep, rate) in enumerate(zip(episodes_100, detect_rates_100)):
-        plt.text(ep, rate + 0.02, f'{rate:.3f}', ha='center', fontsize=9)
-    
-    # 第三个子图：每100集的连续丢失概率
-    plt.subplot(2, 2, 3)
-    plt.plot(episodes_100, lost_probs_100, marker='s', linestyle='-', color='r', linewidth=2)
-    plt.xlabel('Episode (per 100)')
-    plt.ylabel('Lost Probability')
-    plt.title('2 Continuous Loss Probability (every 100 episodes)')
-    plt.ylim([0, 1.05])
-    plt.grid(True, alpha=0.3)
-    for i, (ep, prob) in enumerate(zip(episodes_100, lost_probs_100)):
-        plt.text(ep, prob + 0.02, f'{prob:.3f}', ha='center', fontsize=9)
-    
-    # 第四个子图：每100集的切换率
-    plt.subplot(2, 2, 4)
-    plt.plot(episodes_100, switch_rates_100, marker='^', linestyle='-', color='orange', linewidth=2)
-    plt.xlabel('Episode (per 100)')
-    plt.ylabel('Switch Rate')
-    plt.title('3 Switch Rate (every 100 episodes)')
-    plt.ylim([0, max(switch_rates_100) * 1.2 if switch_rates_100 else 0.5])
-    plt.grid(True, alpha=0.3)
-    for i, (ep, rate) in enumerate(zip(episodes_100, switch_rates_100)):
-        plt.text(ep, rate + max(switch_rates_100) * 0.02 if switch_rates_100 else 0.02, f'{rate:.3f}', ha='center', fontsize=9)
-    
-    plt.tight_layout()
-    plt.savefig('./training_metrics.png', dpi=150, bbox_inches='tight')
-    print("\n✅ 训练指标图已保存为: ./training_metrics.png")
-    plt.show()
-
-    # 原始的传感器动作散点图
-    plt.figure(figsize=(12, 4))
-    plt.scatter(episode_steps, episode_actions, marker='.', color='r', alpha=0.5)
-    plt.xlabel('Episode')
-    plt.ylabel('Sensor ID')
-    plt.title('Sensor Actions Over Episodes')
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('./sensor_actions.png', dpi=150, bbox_inches='tight')
-    print("✅ 传感器动作图已保存为: ./sensor_actions.png")
-    plt.show()
+            avg = rolling.mean()
+            print(f"[Episode {episode}] 探测率: {avg['detect_rate']:.4f}, 丢失概率: {avg['lost_prob']:.4f}, 切换率: {avg['switch_rate']:.4f}")
+            if timer:
+                summary = timer.window_summary()
+                print(f"[Episode {episode}] 阶段耗时: {timer.format_summary(summary)}")
+                timing.write(dict(episode=episode, **summary))
+            converged = monitor.update(episode, avg, agent)
+            if converged:
+                logger.info('converged at episode {}: no improvement above {} for {} x 100 episodes'.format(
+                    episode, monitor.tolerance, monitor.patience))
+
+        # 定期断点：在训练线程中拷贝状态（毫秒级），序列化与写盘在后台线程完成
+        if checkpointer is not None and episode % args.checkpoint_every == 0:
+            checkpointer.save({'episode': episode, 'agent': snapshot_agent(agent), 'replay': snapshot_replay(rpm),
+                               'env': snapshot_env(env), 'rolling': copy.deepcopy(rolling),
+                               'monitor': copy.deepcopy(monitor),
+                               'metrics_offset': metrics.tell(),
+                               'timing_offset': timing.tell() if timing is not None else None})
+
+    if checkpointer is not None:
+        checkpointer.wait()
+    if monitor.restore_best(agent):         # 保存的 model.ckpt / inference_model 为最优窗口的模型
+        logger.info('keeping the best model (episodes {}-{}, mean reward {:.2f})'.format(
+            monitor.best_episode - 99, monitor.best_episode, monitor.best_score))
+    metrics.close()
+    if timing is not None:
+        timing.close()
+    if profiler is not None:
+        report = profiler.finish()      # 训练在剖析窗口结束前停止
+        if report:
+            print(report)
+    if venv is not None:
+        venv.close()
+    if isinstance(rpm, CompactReplayMemory):
+        rpm.flush()
+
     # train part
     # for i in range(10):     # 内循环，每次训练运行50个训练周期
     #     total_reward = run_train_episode(agent, env, rpm)       # 运行一个训练周期，返回该周期内获得的总奖励
@@ -239,6 +377,9 @@ def main():
     input_dtypes = ['float32']                                       # 定义输入的数据类型
     agent.save_inference_model(save_inference_path, input_shapes, input_dtypes)     # 保存用于推理的模型和参数
 
+    # 模型保存之后再绘图：默认在后台进程中从指标文件渲染（Agg 后端，不阻塞、不弹窗）
+    dispatch_report(args.report, ['train', '--metrics', args.metrics, '--out_dir', '.'])
+
 
 if __name__ == '__main__':      # # 检查脚本是否被直接运行
     parser = argparse.ArgumentParser()      # 创建一个参数解析器对象，用于解析命令行参数
@@ -247,6 +388,116 @@ if __name__ == '__main__':      # # 检查脚本是否被直接运行
         type=int,
         default=16000,
         help='stop condition: number of max episode')
+    parser.add_argument(
+        '--num_envs',
+        type=int,
+        default=1,
+        help='number of environments stepped together (1 = single Env)')
+    parser.add_argument(
+        '--num_workers',
+        type=int,
+        default=0,
+        help='worker processes hosting the environments (0 = in-process VectorEnv)')
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+        help='root random seed for environments, exploration and network initialisation')
+    parser.add_argument(
+        '--prioritized',
+        action='store_true',
+        help='use sum-tree prioritized experience replay instead of uniform sampling')
+    parser.add_argument(
+        '--replay_dir',
+        type=str,
+        default=None,
+        help='memory-mapped compact replay directory; reopened to warm-start if it exists')
+    parser.add_argument(
+        '--metrics',
+        type=str,
+        default='./train_metrics.jsonl',
+        help='per-episode metrics file (.jsonl or .csv), streamed during training')
+    parser.add_argument(
+        '--checkpoint_dir',
+        type=str,
+        default='./checkpoints',
+        help='directory of the periodic training checkpoint')
+    parser.add_argument(
+        '--checkpoint_every',
+        type=int,
+        default=500,
+        help='episodes between checkpoints (0 disables checkpointing)')
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='continue from the checkpoint in --checkpoint_dir')
+    parser.add_argument(
+        '--log_every',
+        type=int,
+        default=1,
+        help='print the episode reward line every N episodes')
+    parser.add_argument(
+        '--patience',
+        type=int,
+        default=0,
+        help='stop after this many 100-episode windows without improvement (0 = never stop early, the default)')
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.005,
+        help='minimum change of detect rate, loss probability or switch rate that counts as improvement')
+    parser.add_argument(
+        '--min_episodes',
+        type=int,
+        default=2000,
+        help='episodes trained before convergence can stop the run')
+    parser.add_argument(
+        '--warmup_policy',
+        type=str,
+        default='random',
+        choices=('agent',) + POLICIES,
+        help='how the replay warmup is filled: vectorized NumPy random/nearest-sensor actions, '
+             'or the agent stepping training episodes')
+    parser.add_argument('--warmup_envs', type=int, default=64, help='environments stepped together during warmup')
+    parser.add_argument('--warmup_epsilon', type=float, default=0.1,
+                        help='random action probability mixed into the nearest-sensor warmup policy')
+    parser.add_argument(
+        '--report',
+        type=str,
+        default='background',
+        choices=REPORT_MODES,
+        help='render the training plots in a background process, inline, or not at all (see report.py)')
+    parser.add_argument(
+        '--time_phases',
+        type=str,
+        default='',
+        help="comma-separated phases to time (env_step,sample,append,sample_batch,learn,"
+             "sync_target,to_tensor,backward) or 'all'; empty disables timing")
+    parser.add_argument(
+        '--profile',
+        type=str,
+        default=None,
+        help='run cProfile over an episode window START:STOP (inclusive), e.g. 200:220')
+    parser.add_argument(
+        '--profile_out',
+        type=str,
+        default='./train_profile.pstats',
+        help='pstats file written when the profile window ends')
+    parser.add_argument('--learn_freq', type=int, default=LEARN_FREQ, help='environment steps between updates')
+    parser.add_argument('--batch_size', type=int, default=BATCH_SIZE, help='replay batch size')
+    parser.add_argument('--learning_rate', type=float, default=LEARNING_RATE, help='optimizer learning rate')
+    parser.add_argument('--gamma', type=float, default=GAMMA, help='discount factor')
+    parser.add_argument('--memory_warmup_size', type=int, default=MEMORY_WARMUP_SIZE,
+                        help='transitions collected before learning starts')
+    parser.add_argument('--update_target_steps', type=int, default=UPDATE_TARGET_STEPS,
+                        help='updates between target network syncs')
+    parser.add_argument(
+        '--rewards',
+        type=str,
+        default=None,
+        help='JSON object overriding Envir.DEFAULT_REWARDS, e.g. \'{"switch": -1.0}\'')
     args = parser.parse_args()          # 解析命令行参数
+    if args.prioritized and args.replay_dir:
+        parser.error('--prioritized and --replay_dir cannot be combined')
 
     main()          # 调用主函数进行训练和评估
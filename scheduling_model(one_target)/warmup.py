@@ -0,0 +1,66 @@
+"""
+无网络的经验预热：
+- collect_transitions：用 VectorEnv 同时推进 num_envs 个环境，动作由均匀随机策略或 NearestSensorPolicy
+  （启发式，可混入 epsilon 比例的随机动作）直接用 NumPy 生成，不经过 agent / paddle；
+- insert_transitions：一次调用把整批经验写入回放缓冲区（ReplayMemory / PrioritizedReplayMemory 切片赋值，
+  CompactReplayMemory 按流写入）。
+
+训练开始前的预热因此只需要 count / num_envs 次批量 step，而不是 count 次逐条的采样、前向与 append。
+"""
+
+import numpy as np
+
+from Envir import VectorEnv
+from sensor_index import NearestSensorPolicy
+from seeding import make_rng, spawn_seeds
+from prioritized_replay import bulk_append
+from compact_replay import CompactReplayMemory
+
+POLICIES = ("random", "nearest")
+
+
+def collect_transitions(count, num_envs=64, policy="random", epsilon=0.1, seed=None, rewards=None):
+    """收集至少 count 条经验：返回 (obs, action, reward, next_obs, terminal)，形状为 (T, num_envs, ...)，
+    T = ceil(count / num_envs)；第 t 行是所有环境同时推进的第 t 步，结束的环境自动 reset
+    （next_obs 为终止时刻的观测）。epsilon 只对 nearest 策略生效。"""
+    if policy not in POLICIES:
+        raise ValueError("warmup policy must be one of %s, got %r" % (POLICIES, policy))
+    env_seed, policy_seed = spawn_seeds(seed, 2)
+    venv = VectorEnv(num_envs, seed=env_seed, rewards=rewards)
+    rng = make_rng(policy_seed)
+    heuristic = NearestSensorPolicy(venv.sensor_table.index) if policy == "nearest" else None
+
+    steps = -(-int(count) // num_envs)
+    shape = (steps, num_envs)
+    obs_buf = np.empty(shape + (6,), dtype=np.float32)
+    next_buf = np.empty(shape + (6,), dtype=np.float32)
+    act_buf = np.empty(shape, dtype=np.int64)
+    reward_buf = np.empty(shape, dtype=np.float32)
+    done_buf = np.empty(shape, dtype=bool)
+
+    obs = venv.reset()
+    for t in range(steps):
+        action = rng.integers(venv.act_dim, size=num_envs)
+        if heuristic is not None:
+            action = np.where(rng.random(num_envs) < epsilon, action, heuristic.predict_batch(obs))
+        next_obs, reward, done, info = venv.step(action)
+        obs_buf[t], act_buf[t], reward_buf[t] = obs, action, reward
+        next_buf[t], done_buf[t] = info["final_obs"], done
+        obs = next_obs
+    return obs_buf, act_buf, reward_buf, next_buf, done_buf
+
+
+def insert_transitions(rpm, obs, act, reward, next_obs, terminal):
+    """把 collect_transitions 的结果一次写入回放缓冲区。
+
+    CompactReplayMemory 要求 num_envs 等于流的数量（每个环境写入各自的流），写入后丢弃各流最后一条
+    未结束的经验 —— 之后写入同一条流的是训练环境的新 episode，不是它的后继。
+    """
+    if isinstance(rpm, CompactReplayMemory):
+        rpm.append_steps(obs, act, reward, next_obs, terminal)
+        rpm.drop_pending()
+        return
+    obs = np.asarray(obs)
+    rows = obs.shape[0] * obs.shape[1]
+    bulk_append(rpm, obs.reshape(rows, -1), np.asarray(act).reshape(rows), np.asarray(reward).reshape(rows),
+                np.asarray(next_obs).reshape(rows, -1), np.asarray(terminal).reshape(rows))